@@ -8,6 +8,7 @@ from pandas import (
     DatetimeIndex,
     date_range,
     Timedelta,
+    concat,
     read_csv
 )
 from pandas.testing import (assert_frame_equal)
@@ -15,8 +16,22 @@ from pandas.testing import (assert_frame_equal)
 import os
 import gzip
 
+import numpy as np
+
 from pyfolio.round_trips import (extract_round_trips,
+                                 extract_round_trips_incremental,
                                  add_closing_transactions,
+                                 apply_sector_mappings_to_round_trips,
+                                 gen_round_trip_stats,
+                                 gen_rolling_round_trip_stats,
+                                 compact_round_trips,
+                                 expand_round_trips,
+                                 agg_all_long_short,
+                                 agg_stats,
+                                 PNL_STATS,
+                                 SUMMARY_STATS,
+                                 RETURN_STATS,
+                                 DURATION_STATS,
                                  _groupby_consecutive,
                                  )
 
@@ -121,6 +136,20 @@ class RoundTripTestCase(TestCase):
                             'long', 'symbol'],
                    index=[0])
          ),
+        # Round-trip over a large number of shares closing several lots
+        (DataFrame(data=[[500000, 10., 'A'],
+                         [500000, 20., 'A'],
+                         [-750000, 30., 'A']],
+                   columns=['amount', 'price', 'symbol'],
+                   index=dates[[0, 2, 4]]),
+         DataFrame(data=[[dates[0], dates[4],
+                          Timedelta(days=4), 12500000., 1.25,
+                          True, 'A']],
+                   columns=['open_dt', 'close_dt',
+                            'duration', 'pnl', 'rt_returns',
+                            'long', 'symbol'],
+                   index=[0])
+         ),
         # Round-trip that does not cross 0 and has portfolio value
         (DataFrame(data=[[4, 10., 'A'],
                          [-2, 15., 'A'],
@@ -136,6 +165,21 @@ class RoundTripTestCase(TestCase):
                    index=[0]),
          Series([100., 100., 100.], index=dates[:3]),
          ),
+        # Round-trip closed on a date without portfolio value
+        (DataFrame(data=[[4, 10., 'A'],
+                         [-2, 15., 'A'],
+                         [2, 20., 'A']],
+                   columns=['amount', 'price', 'symbol'],
+                   index=dates[:3]),
+         DataFrame(data=[[dates[0], dates[1],
+                          Timedelta(days=1), 10., .5,
+                          True, 'A', 0.1]],
+                   columns=['open_dt', 'close_dt',
+                            'duration', 'pnl', 'rt_returns',
+                            'long', 'symbol', 'returns'],
+                   index=[0]),
+         Series([100., 50.], index=dates[[0, 2]]),
+         ),
 
     ])
     def test_extract_round_trips(self, transactions, expected,
@@ -146,6 +190,35 @@ class RoundTripTestCase(TestCase):
         assert_frame_equal(round_trips.sort_index(axis='columns'),
                            expected.sort_index(axis='columns'))
 
+    @parameterized.expand([
+        ('fifo', 0, 5., 5. / 40),
+        ('lifo', 2, -5., -5. / 50),
+        ('hifo', 1, -10., -10. / 55),
+        ('average', 0, 0., 0.),
+    ])
+    def test_extract_round_trips_matching(self, matching, open_ix,
+                                          expected_pnl,
+                                          expected_rt_returns):
+        transactions = DataFrame(data=[[2, 10., 'A'],
+                                       [2, 20., 'A'],
+                                       [2, 15., 'A'],
+                                       [-3, 15., 'A']],
+                                 columns=['amount', 'price', 'symbol'],
+                                 index=self.dates[[0, 2, 4, 6]])
+        expected = DataFrame(data=[[self.dates[open_ix * 2], self.dates[6],
+                                    self.dates[6] - self.dates[open_ix * 2],
+                                    expected_pnl, expected_rt_returns,
+                                    True, 'A']],
+                             columns=['open_dt', 'close_dt',
+                                      'duration', 'pnl', 'rt_returns',
+                                      'long', 'symbol'],
+                             index=[0])
+
+        round_trips = extract_round_trips(transactions, matching=matching)
+
+        assert_frame_equal(round_trips.sort_index(axis='columns'),
+                           expected.sort_index(axis='columns'))
+
     def test_add_closing_trades(self):
         dates = date_range(start='2015-01-01', periods=20)
         transactions = DataFrame(data=[[2, 10, 'A'],
@@ -189,3 +262,226 @@ class RoundTripTestCase(TestCase):
 
         self.assertAlmostEqual(round_trips.pnl.sum(),
                                transactions_closed.txn_dollars.sum())
+
+    def test_extract_round_trips_parallel(self):
+        __location__ = os.path.realpath(
+            os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
+        test_txn = read_csv(gzip.open(
+                            __location__ + '/test_data/test_txn.csv.gz'),
+                            index_col=0, parse_dates=True)
+
+        round_trips = extract_round_trips(test_txn)
+        round_trips_parallel = extract_round_trips(test_txn, n_jobs=2)
+
+        assert_frame_equal(round_trips_parallel, round_trips)
+
+    def test_extract_round_trips_incremental(self):
+        __location__ = os.path.realpath(
+            os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
+        test_txn = read_csv(gzip.open(
+                            __location__ + '/test_data/test_txn.csv.gz'),
+                            index_col=0, parse_dates=True)
+        split_dt = test_txn.index[len(test_txn) // 2].normalize()
+
+        round_trips = extract_round_trips(test_txn)
+
+        round_trips_1, open_lots = extract_round_trips_incremental(
+            test_txn[test_txn.index < split_dt])
+        round_trips_2, _ = extract_round_trips_incremental(
+            test_txn[test_txn.index >= split_dt], open_lots)
+
+        round_trips_incremental = (concat([round_trips_1, round_trips_2])
+                                   .sort_values(['symbol', 'close_dt'],
+                                                kind='mergesort')
+                                   .reset_index(drop=True))
+
+        assert_frame_equal(round_trips_incremental, round_trips)
+
+    def test_gen_round_trip_stats(self):
+        __location__ = os.path.realpath(
+            os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
+        test_txn = read_csv(gzip.open(
+                            __location__ + '/test_data/test_txn.csv.gz'),
+                            index_col=0, parse_dates=True)
+        test_pos = read_csv(gzip.open(
+                            __location__ + '/test_data/test_pos.csv.gz'),
+                            index_col=0, parse_dates=True)
+
+        transactions_closed = add_closing_transactions(test_pos, test_txn)
+        round_trips = extract_round_trips(
+            transactions_closed,
+            portfolio_value=test_pos.sum(axis='columns'))
+
+        stats = gen_round_trip_stats(round_trips)
+
+        for name, col, stats_dict in [('pnl', 'pnl', PNL_STATS),
+                                      ('summary', 'pnl', SUMMARY_STATS),
+                                      ('duration', 'duration',
+                                       DURATION_STATS),
+                                      ('returns', 'returns', RETURN_STATS)]:
+            expected = agg_all_long_short(round_trips, col, stats_dict)
+            expected.columns.name = None
+            assert_frame_equal(stats[name], expected)
+
+        expected = (round_trips.groupby('symbol')['returns']
+                    .agg(**RETURN_STATS).T)
+        assert_frame_equal(stats['symbols'], expected)
+
+        # Frames without the date columns are accepted as before
+        stats = gen_round_trip_stats(
+            round_trips.drop(columns=['open_dt', 'close_dt']))
+        assert_frame_equal(stats['symbols'], expected)
+
+    def test_agg_stats_custom_stats(self):
+        round_trips = DataFrame({'pnl': [10., -5., 3., -1.],
+                                 'long': [True, True, False, False]})
+        stats_dict = {'Total profit': lambda x: x.abs().sum(),
+                      'Largest losing trade': 'max',
+                      'Gross loss': PNL_STATS['Gross loss']}
+
+        stats, _ = agg_stats(round_trips, 'pnl', stats_dict, by='long')
+
+        expected = round_trips.groupby('long')['pnl'].agg(**stats_dict).T
+        assert_frame_equal(stats, expected, check_names=False,
+                           check_dtype=False)
+
+    def test_compact_round_trips(self):
+        transactions = DataFrame(data=[[2, 10., 'A'],
+                                       [-4, 15., 'A'],
+                                       [3, 20., 'A'],
+                                       [1, 5., 'B'],
+                                       [-1, 6., 'B']],
+                                 columns=['amount', 'price', 'symbol'],
+                                 index=self.dates[[0, 1, 2, 3, 4]]
+                                 .tz_localize('UTC'))
+        portfolio_value = Series(100., index=self.dates.tz_localize('UTC'))
+
+        round_trips = extract_round_trips(transactions,
+                                          portfolio_value=portfolio_value)
+        compact = compact_round_trips(round_trips)
+
+        self.assertEqual(compact.symbol.dtype, 'category')
+        self.assertEqual(compact.open_dt.dtype, 'int64')
+        self.assertEqual(compact.pnl.dtype, 'float32')
+        self.assertNotIn('duration', compact)
+
+        assert_frame_equal(expand_round_trips(compact), round_trips,
+                           check_dtype=False)
+
+        stats = gen_round_trip_stats(round_trips)
+        stats_compact = gen_round_trip_stats(compact)
+        for name in stats:
+            assert_frame_equal(stats_compact[name], stats[name],
+                               check_dtype=False)
+
+    def test_sector_round_trip_stats(self):
+        transactions = DataFrame(data=[[2, 10., 'A'],
+                                       [-2, 15., 'A'],
+                                       [1, 5., 'B'],
+                                       [-1, 4., 'B'],
+                                       [3, 10., 'C'],
+                                       [-3, 12., 'C']],
+                                 columns=['amount', 'price', 'symbol'],
+                                 index=self.dates[:6])
+        portfolio_value = Series(100., index=self.dates)
+        sector_mappings = {'A': 'Tech', 'B': 'Tech'}
+
+        round_trips = extract_round_trips(transactions,
+                                          portfolio_value=portfolio_value)
+
+        sector_round_trips = apply_sector_mappings_to_round_trips(
+            round_trips, sector_mappings)
+        self.assertEqual(sector_round_trips.symbol.tolist(),
+                         ['Tech', 'Tech', 'No Sector Mapping'])
+
+        stats = gen_round_trip_stats(round_trips,
+                                     sector_mappings=sector_mappings)
+        expected = gen_round_trip_stats(sector_round_trips)['symbols']
+        assert_frame_equal(stats['sectors'], expected, check_names=False)
+        self.assertEqual(stats['sector_pnl'].loc['Total profit', 'Tech'],
+                         9.)
+
+    def test_extract_round_trips_fractional(self):
+        transactions = DataFrame(data=[[0.1, 10., 'A'],
+                                       [0.2, 10., 'A'],
+                                       [-0.3, 20., 'A'],
+                                       [0.37, 10., 'B'],
+                                       [-0.37, 5., 'B']],
+                                 columns=['amount', 'price', 'symbol'],
+                                 index=self.dates[[0, 2, 4, 0, 2]])
+
+        round_trips, open_lots = extract_round_trips_incremental(
+            transactions, fractional=True)
+
+        self.assertEqual(len(round_trips), 2)
+        self.assertAlmostEqual(round_trips.pnl.iloc[0], 3.)
+        self.assertAlmostEqual(round_trips.pnl.iloc[1], -1.85)
+        # No floating point residual is left open
+        self.assertEqual(len(open_lots), 0)
+
+        # Whole shares only by default
+        self.assertEqual(len(extract_round_trips(transactions)), 0)
+
+    def test_extract_round_trips_excursions(self):
+        prices = DataFrame({'A': [10., 9., 12., 11., 10., 8.],
+                            'B': [20., 21., 18., 25., 20., 20.]},
+                           index=self.dates[:6])
+        transactions = DataFrame(data=[[10, 10., 'A'],
+                                       [-10, 11., 'A'],
+                                       [-5, 20., 'B'],
+                                       [5, 20., 'B'],
+                                       [5, 10., 'C'],
+                                       [-5, 10., 'C']],
+                                 columns=['amount', 'price', 'symbol'],
+                                 index=self.dates[[0, 3, 0, 2, 0, 1]])
+
+        round_trips = extract_round_trips(transactions, prices=prices)
+
+        # Long A entered at 10 between 9 and 12, short B entered at 20
+        # between 18 and 21, no prices for C.
+        assert_frame_equal(round_trips[['symbol', 'mae', 'mfe']],
+                           DataFrame({'symbol': ['A', 'B', 'C'],
+                                      'mae': [-0.1, -0.05, float('nan')],
+                                      'mfe': [0.2, 0.1, float('nan')]}))
+
+        stats = gen_round_trip_stats(
+            round_trips.assign(returns=round_trips.rt_returns))
+        self.assertAlmostEqual(
+            stats['excursions'].loc['Largest MAE', 'All trades'], -0.1)
+        self.assertAlmostEqual(
+            stats['excursions'].loc['Avg MFE', 'Short trades'], 0.1)
+
+    def test_gen_rolling_round_trip_stats(self):
+        round_trips = DataFrame({'pnl': [10., -5., 20., -10., 0.],
+                                 'open_dt': self.dates[[0, 0, 0, 2, 8]],
+                                 'close_dt': self.dates[[0, 1, 1, 5, 9]],
+                                 'long': [True, False, True, True, False],
+                                 'symbol': 'A',
+                                 'returns': 0.})
+        round_trips['duration'] = (round_trips.close_dt -
+                                   round_trips.open_dt)
+
+        stats = gen_rolling_round_trip_stats(round_trips, window='5D')
+
+        # One row per close date, covering round trips closed within the
+        # last 5 days.
+        self.assertEqual(list(stats.index), list(self.dates[[0, 1, 5, 9]]))
+        self.assertEqual(
+            list(stats['Total number of round_trips']), [1, 3, 3, 2])
+        self.assertEqual(list(stats['Largest losing trade']),
+                         [10., -5., -10., -10.])
+
+        for end in stats.index:
+            window = round_trips[
+                (round_trips.close_dt > end - Timedelta('5D')) &
+                (round_trips.close_dt <= end)]
+            expected = gen_round_trip_stats(window)
+            for stat, value in stats.loc[end].items():
+                table = ('summary' if stat in expected['summary'].index
+                         else 'pnl')
+                self.assertTrue(
+                    np.isclose(expected[table].loc[stat, 'All trades'],
+                               value, equal_nan=True), stat)
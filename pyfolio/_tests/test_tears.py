@@ -10,7 +10,7 @@ import gzip
 
 import matplotlib
 import matplotlib.pyplot as plt
-from pandas import read_csv
+from pandas import read_csv, concat
 
 from pyfolio.utils import (to_utc, to_series)
 from pyfolio.tears import (create_full_tear_sheet,
@@ -98,6 +98,10 @@ class PositionsTestCase(TestCase):
                            ({'hide_positions': True},),
                            ({'cone_std': 1},),
                            ({'bootstrap': True},),
+                           ({'risk_factors': concat(
+                               [test_returns.rename('a'),
+                                test_returns.shift(5).rename('b')],
+                               axis=1)},),
                            ])
     @cleanup
     def test_create_full_tear_sheet_breakdown(self, kwargs):
@@ -125,6 +129,10 @@ class PositionsTestCase(TestCase):
                              test_returns.index[-20]},),
                            ({'cone_std': 1},),
                            ({'bootstrap': True},),
+                           ({'risk_factors': concat(
+                               [test_returns.rename('a'),
+                                test_returns.shift(5).rename('b')],
+                               axis=1)},),
                            ])
     @cleanup
     def test_create_returns_tear_sheet_breakdown(self, kwargs):
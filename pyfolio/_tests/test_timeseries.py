@@ -2,12 +2,14 @@ from __future__ import division
 
 import os
 from unittest import TestCase
+from unittest.mock import patch
 from parameterized import parameterized
 from numpy.testing import assert_allclose, assert_almost_equal
 from pandas.testing import assert_series_equal
 
 import numpy as np
 import pandas as pd
+import empyrical as ep
 
 from .. import timeseries
 from pyfolio.utils import to_utc, to_series
@@ -166,6 +168,25 @@ class TestDrawdown(TestCase):
             if expected_duration is None else self.assertEqual(
                 drawdowns.loc[0, 'Duration'], expected_duration)
 
+    def test_gen_drawdown_table_all(self):
+        # Calendar days, so that durations skip the weekend
+        px = pd.Series([100, 90, 101, 95, 105, 110, 80, 90],
+                       index=pd.date_range('2000-1-6', periods=8, freq='D',
+                                           tz='UTC'))
+
+        drawdowns = timeseries.gen_drawdown_table(px.pct_change(), top=None)
+
+        self.assertEqual(list(drawdowns.index), [0, 1, 2])
+        assert_allclose(drawdowns['Net drawdown in %'],
+                        [100 * 30. / 110, 10., 100 * 6. / 101])
+        self.assertEqual(list(drawdowns['Peak date']),
+                         list(pd.to_datetime(['2000-1-11', '2000-1-6',
+                                              '2000-1-8'])))
+        self.assertTrue(pd.isnull(drawdowns.loc[0, 'Recovery date']))
+        self.assertTrue(pd.isnull(drawdowns.loc[0, 'Duration']))
+        # Thursday to Saturday, and Saturday to Monday
+        self.assertEqual(list(drawdowns.Duration[1:]), [2, 1])
+
     def test_drawdown_overlaps(self):
         rand = np.random.RandomState(1337)
         n_samples = 252 * 5
@@ -200,6 +221,24 @@ class TestDrawdown(TestCase):
                 top=top),
             expected)
 
+    def test_top_drawdowns_all(self):
+        returns = pd.Series([.1, -.1, .2, -.05, .1, -.1, -.1, .5, -.2],
+                            index=pd.date_range('2000-1-3', periods=9,
+                                                freq='D'))
+        dates = returns.index
+
+        drawdowns = timeseries.get_top_drawdowns(returns, top=None)
+
+        # Deepest first; the last one has not recovered
+        self.assertEqual(drawdowns[0][:2], (dates[7], dates[8]))
+        self.assertTrue(pd.isnull(drawdowns[0][2]))
+        self.assertEqual(drawdowns[1:],
+                         [(dates[4], dates[6], dates[7]),
+                          (dates[0], dates[1], dates[2]),
+                          (dates[2], dates[3], dates[4])])
+        self.assertEqual(timeseries.get_top_drawdowns(returns, top=2),
+                         drawdowns[:2])
+
 
 class TestVariance(TestCase):
 
@@ -284,6 +323,122 @@ class TestStats(TestCase):
 
         np.testing.assert_almost_equal(actual, expected)
 
+    def test_beta_multiple_factors(self):
+        returns = self.simple_rets[:60] + np.sin(np.arange(60.)) / 100
+        returns.iloc[[10, 30]] = np.nan
+        factor_returns = pd.DataFrame(
+            {'a': np.cos(np.arange(60.)) / 100,
+             'b': self.simple_benchmark[2:62].values},
+            index=returns.index)
+        factor_returns.iloc[20, 0] = np.nan
+
+        actual = timeseries.rolling_beta(returns, factor_returns,
+                                         rolling_window=5)
+
+        self.assertEqual(list(actual.columns), ['a', 'b'])
+        self.assertTrue(actual.iloc[:4].isnull().all().all())
+        for end in range(4, 60):
+            window = returns.index[end - 4:end + 1]
+            for col in factor_returns:
+                np.testing.assert_almost_equal(
+                    actual[col].iloc[end],
+                    ep.beta(returns[window], factor_returns[col][window]))
+        assert_series_equal(
+            timeseries.rolling_beta(returns, factor_returns['a'],
+                                    rolling_window=5),
+            actual['a'].rename(None))
+
+    def test_rolling_regression(self):
+        index = pd.date_range('2000-1-3', periods=60, freq='D')
+        factor_returns = pd.DataFrame(
+            {'a': np.sin(np.arange(60.)) / 100,
+             'b': np.cos(np.arange(60.) / 3) / 100},
+            index=index)
+        returns = (0.001 + 1.5 * factor_returns.a - 0.5 * factor_returns.b)
+        returns.iloc[10] = np.nan
+        factor_returns.iloc[20:30, 1] = 0.01
+
+        actual = timeseries.rolling_regression(returns, factor_returns,
+                                               rolling_window=10)
+
+        self.assertEqual(list(actual.columns),
+                         ['alpha', 'a', 'b', 'r_squared'])
+        # Exact fit wherever both factors vary within the window
+        fitted = actual.iloc[[9, 19, 40, 59]]
+        assert_allclose(fitted.alpha, 0.001)
+        assert_allclose(fitted.a, 1.5)
+        assert_allclose(fitted.b, -0.5)
+        assert_allclose(fitted.r_squared, 1.)
+        # Too few days, or a constant factor
+        self.assertTrue(actual.iloc[:9].isnull().all().all())
+        self.assertTrue(actual.iloc[29].isnull().all())
+
+        # A single factor gives the same betas as rolling_beta
+        assert_allclose(
+            timeseries.rolling_regression(
+                returns, factor_returns.a, rolling_window=10).a,
+            timeseries.rolling_beta(
+                returns, factor_returns.a, rolling_window=10))
+
+    @parameterized.expand([
+        (simple_rets,),
+        (simple_rets[:1],),
+        (pd.Series(px_list, dt),),
+        (pd.Series(px_list_2, dt_2).pct_change(),),
+        (pd.Series(np.sin(np.arange(300.)) / 100 + 0.001,
+                   pd.date_range('2000-1-3', periods=300, freq='D')),),
+    ])
+    def test_returns_profile(self, returns):
+        profile = timeseries.ReturnsProfile(returns)
+        for stat_func in timeseries.SIMPLE_STAT_FUNCS:
+            assert_allclose(profile.stat(stat_func), stat_func(returns),
+                            rtol=1e-10, atol=1e-14,
+                            err_msg=stat_func.__name__)
+
+        assert_series_equal(timeseries.perf_stats(profile),
+                            timeseries.perf_stats(returns))
+
+        # One column per strategy
+        frame = pd.concat([returns, -returns], axis=1)
+        profile = timeseries.ReturnsProfile(frame)
+        for stat_func in timeseries.SIMPLE_STAT_FUNCS:
+            assert_allclose(
+                profile.stat(stat_func),
+                [stat_func(frame[0]), stat_func(frame[1])],
+                rtol=1e-10, atol=1e-14, err_msg=stat_func.__name__)
+
+    def test_perf_stats_frame(self):
+        index = pd.date_range('2000-1-3', periods=300, freq='D')
+        returns = pd.DataFrame(
+            {'a': np.sin(np.arange(300.)) / 100 + 0.001,
+             'b': np.cos(np.arange(300.) / 7) / 100,
+             'c': np.nan, 'd': 0.})
+        returns.index = index
+        # Strategies starting late, ending early or with a gap
+        returns.iloc[:120, 0] = np.nan
+        returns.iloc[250:, 1] = np.nan
+        returns.iloc[[40, 41], 3] = np.nan
+        factor_returns = pd.Series(
+            np.sin(np.arange(300.) / 3) / 100, index)[5:]
+
+        with patch.object(timeseries, 'PERF_STATS_CHUNK_SIZE', 3):
+            actual = timeseries.perf_stats(returns, factor_returns)
+
+        self.assertEqual(list(actual.index), ['a', 'b', 'c', 'd'])
+        for strategy in returns:
+            column = returns[strategy]
+            if column.isnull().all():
+                self.assertTrue(actual.loc[strategy].isnull().all())
+                continue
+            column = column.loc[column.first_valid_index():
+                                column.last_valid_index()]
+            expected = timeseries.perf_stats(column, factor_returns)
+            assert_series_equal(actual.loc[strategy], expected,
+                                check_names=False, atol=1.1e-4)
+
+        with self.assertRaises(ValueError):
+            timeseries.perf_stats(returns, positions=pd.DataFrame())
+
 
 class TestCone(TestCase):
     def test_bootstrap_cone_against_linear_cone_normal_returns(self):
@@ -311,6 +466,82 @@ class TestCone(TestCase):
             expected = normal_cone[col].values
             assert_allclose(vals.values, expected, rtol=.005)
 
+    def test_simulate_paths(self):
+        is_returns = pd.Series([-.02, -.01, 0., .01, .03])
+
+        samples = timeseries.simulate_paths(is_returns, 30, num_samples=100,
+                                            random_seed=1)
+
+        self.assertEqual(samples.shape, (100, 30))
+        self.assertTrue(np.isin(samples, is_returns.values).all())
+
+        chunks = list(timeseries.simulate_paths(
+            is_returns, 30, num_samples=100, random_seed=1, chunksize=40))
+        self.assertEqual([len(chunk) for chunk in chunks], [40, 40, 20])
+        np.testing.assert_array_equal(np.concatenate(chunks), samples)
+
+        for sampling in ['block', 'stationary']:
+            samples = timeseries.simulate_paths(
+                is_returns, 30, num_samples=100, random_seed=1,
+                sampling=sampling, block_size=3)
+            chunks = timeseries.simulate_paths(
+                is_returns, 30, num_samples=100, random_seed=1,
+                sampling=sampling, block_size=3, chunksize=7)
+            np.testing.assert_array_equal(np.concatenate(list(chunks)),
+                                          samples, err_msg=sampling)
+
+    def test_summarize_paths_chunks(self):
+        is_returns = pd.Series(np.sin(np.arange(50.)) / 100)
+        samples = timeseries.simulate_paths(is_returns, 20, num_samples=500,
+                                            random_seed=1)
+        chunks = timeseries.simulate_paths(is_returns, 20, num_samples=500,
+                                           random_seed=1, chunksize=64)
+
+        expected = timeseries.summarize_paths(samples, starting_value=2.)
+        actual = timeseries.summarize_paths(chunks, starting_value=2.,
+                                            quantiles=[.05, .95])
+
+        pd.testing.assert_frame_equal(actual[expected.columns], expected,
+                                      check_column_type=False)
+        cum_samples = 2. * np.cumprod(1 + samples, axis=1)
+        assert_allclose(actual['5%'], np.quantile(cum_samples, .05, axis=0))
+        assert_allclose(actual['95%'], np.quantile(cum_samples, .95, axis=0))
+
+        with self.assertRaises(ValueError):
+            timeseries.summarize_paths(iter([]))
+        with self.assertRaises(ValueError):
+            timeseries.summarize_paths(samples[:0])
+        with self.assertRaises(ValueError):
+            timeseries.summarize_paths(samples, quantiles=[.5],
+                                       quantile_samples=0)
+
+    @parameterized.expand([('block',), ('stationary',)])
+    def test_simulate_paths_blocks(self, sampling):
+        is_returns = pd.Series(np.arange(100.))
+
+        samples = timeseries.simulate_paths(is_returns, 60, num_samples=200,
+                                            random_seed=1, sampling=sampling,
+                                            block_size=10)
+
+        self.assertEqual(samples.shape, (200, 60))
+        # Consecutive days within blocks (wrapping around for stationary)
+        steps = np.diff(samples, axis=1)
+        continued = (steps == 1) | (steps == -99)
+        if sampling == 'block':
+            self.assertTrue(continued[:, np.arange(59) % 10 != 9].all())
+        else:
+            self.assertAlmostEqual(continued.mean(), 0.9, delta=0.02)
+
+        cone = timeseries.forecast_cone_bootstrap(
+            is_returns / 1000, 60, num_samples=200, random_seed=1,
+            sampling=sampling)
+        self.assertEqual(cone.shape, (60, 6))
+
+    def test_simulate_paths_invalid_sampling(self):
+        with self.assertRaises(ValueError):
+            timeseries.simulate_paths(pd.Series([.01, .02]), 10,
+                                      sampling='blocks')
+
 
 class TestBootstrap(TestCase):
     @parameterized.expand([
@@ -329,7 +560,8 @@ class TestBootstrap(TestCase):
                             true_mean)
 
         samples = timeseries.calc_bootstrap(func, returns,
-                                            n_samples=10000)
+                                            n_samples=10000,
+                                            random_state=123)
 
         # Calculate statistics of sampling distribution of the mean
         mean_of_mean = np.mean(returns)
@@ -349,6 +581,64 @@ class TestBootstrap(TestCase):
             'SD of bootstrap does not match theoretical SD of'
             'sampling distribution')
 
+    @parameterized.expand([
+        (stat_func, returns) for stat_func in
+        timeseries.SIMPLE_STAT_FUNCS + timeseries.FACTOR_STAT_FUNCS
+        for returns in [pd.Series(np.sin(np.arange(100.)) / 100 + 0.001),
+                        pd.Series(np.zeros(100))]
+    ])
+    def test_calc_bootstrap_vectorized(self, stat_func, returns):
+        """Stats evaluated on all samples at once match the per-sample
+        loop on the same samples, including flat returns.
+
+        """
+        factor_returns = pd.Series(np.cos(np.arange(100.)) / 100)
+        if stat_func in timeseries.FACTOR_STAT_FUNCS:
+            kwargs = {'factor_returns': factor_returns}
+        else:
+            kwargs = {}
+
+        np.random.seed(123)
+        vectorized = timeseries.calc_bootstrap(stat_func, returns,
+                                               n_samples=20, **kwargs)
+        np.random.seed(123)
+        looped = timeseries.calc_bootstrap(
+            lambda *args: stat_func(*args), returns, n_samples=20,
+            **kwargs)
+
+        assert_allclose(vectorized, looped)
+
+    def test_bootstrap_random_state(self):
+        returns = pd.Series(np.sin(np.arange(300.)) / 100 + 0.001)
+        factor_returns = pd.Series(np.cos(np.arange(300.)) / 100)
+
+        serial = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, return_stats=False, random_state=42,
+            n_samples=600)
+        parallel = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, return_stats=False, random_state=42,
+            n_samples=600, n_jobs=2)
+
+        self.assertEqual(serial.shape, (600, 15))
+        pd.testing.assert_frame_equal(serial, parallel, check_exact=True)
+
+        np.testing.assert_array_equal(
+            timeseries.calc_bootstrap(np.median, returns, n_samples=600,
+                                      random_state=42),
+            timeseries.calc_bootstrap(np.median, returns, n_samples=600,
+                                      random_state=42, n_jobs=3))
+        np.testing.assert_array_equal(
+            timeseries.calc_bootstrap(np.median, returns, n_samples=600,
+                                      random_state=42, sampling='stationary'),
+            timeseries.calc_bootstrap(np.median, returns, n_samples=600,
+                                      random_state=42, sampling='stationary',
+                                      n_jobs=3))
+        self.assertFalse(np.array_equal(
+            timeseries.calc_bootstrap(np.median, returns, n_samples=600,
+                                      random_state=42),
+            timeseries.calc_bootstrap(np.median, returns, n_samples=600,
+                                      random_state=43)))
+
 
 class TestGrossLev(TestCase):
     __location__ = os.path.realpath(
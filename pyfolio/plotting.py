@@ -20,6 +20,7 @@ from functools import wraps
 
 import empyrical as ep
 import matplotlib
+import matplotlib.dates as mdates
 import matplotlib.patches as patches
 import matplotlib.pyplot as plt
 import numpy as np
@@ -28,6 +29,7 @@ import pytz
 import scipy as sp
 from matplotlib import figure
 from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
 from matplotlib.ticker import FuncFormatter
 
 from . import _seaborn as sns
@@ -36,6 +38,7 @@ from . import pos
 from . import timeseries
 from . import txn
 from . import utils
+from .round_trips import expand_round_trips
 from .utils import (APPROX_BDAYS_PER_MONTH,
                     MM_DISPLAY_UNIT)
 
@@ -847,14 +850,19 @@ def plot_rolling_beta(returns, factor_returns, legend_loc='best',
     """
     Plots the rolling 6-month and 12-month beta versus date.
 
+    If factor_returns is a DataFrame, plots instead the rolling 6-month
+    betas to each factor from a joint multi-factor regression (see
+    timeseries.rolling_regression).
+
     Parameters
     ----------
     returns : pd.Series
         Daily returns of the strategy, noncumulative.
          - See full explanation in tears.create_full_tear_sheet.
-    factor_returns : pd.Series
+    factor_returns : pd.Series or pd.DataFrame
         Daily noncumulative returns of the benchmark factor to which betas are
         computed. Usually a benchmark such as market returns.
+         - If DataFrame is passed, one column per factor.
          - This is in the same style as returns.
     legend_loc : matplotlib.loc, optional
         The location of the legend on the plot.
@@ -875,6 +883,18 @@ def plot_rolling_beta(returns, factor_returns, legend_loc='best',
     y_axis_formatter = FuncFormatter(utils.two_dec_places)
     ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
 
+    if isinstance(factor_returns, pd.DataFrame):
+        ax.set_title("Rolling portfolio betas (6-month multi-factor)")
+        ax.set_ylabel('Beta')
+        betas = timeseries.rolling_regression(
+            returns, factor_returns,
+            rolling_window=APPROX_BDAYS_PER_MONTH * 6)
+        betas[factor_returns.columns].plot(lw=3, alpha=0.6, ax=ax, **kwargs)
+        ax.axhline(0.0, color='black', linestyle='-', lw=2)
+        ax.set_xlabel('')
+        ax.legend(loc=legend_loc, frameon=True, framealpha=0.5)
+        return ax
+
     ax.set_title("Rolling portfolio beta to " + str(factor_returns.name))
     ax.set_ylabel('Beta')
     rb_1 = timeseries.rolling_beta(
@@ -1738,7 +1758,8 @@ def plot_monthly_returns_timeseries(returns, ax=None, **kwargs):
     return ax
 
 
-def plot_round_trip_lifetimes(round_trips, disp_amount=16, lsize=18, ax=None):
+def plot_round_trip_lifetimes(round_trips, disp_amount=16, lsize=18, ax=None,
+                              max_trades_per_symbol=None):
     """
     Plots timespans and directions of a sample of round trip trades.
 
@@ -1749,6 +1770,9 @@ def plot_round_trip_lifetimes(round_trips, disp_amount=16, lsize=18, ax=None):
         - See full explanation in round_trips.extract_round_trips
     ax : matplotlib.Axes, optional
         Axes upon which to plot.
+    max_trades_per_symbol : int, optional
+        If set, only plot the most recently closed round trips of each
+        symbol, to bound rendering time.
 
     Returns
     -------
@@ -1759,21 +1783,41 @@ def plot_round_trip_lifetimes(round_trips, disp_amount=16, lsize=18, ax=None):
     if ax is None:
         ax = plt.subplot()
 
+    round_trips = expand_round_trips(round_trips)
+
     symbols_sample = round_trips.symbol.unique()
     np.random.seed(1)
     sample = np.random.choice(round_trips.symbol.unique(), replace=False,
                               size=min(disp_amount, len(symbols_sample)))
     sample_round_trips = round_trips[round_trips.symbol.isin(sample)]
+    if max_trades_per_symbol is not None:
+        sample_round_trips = (sample_round_trips
+                              .sort_values('close_dt', kind='mergesort')
+                              .groupby('symbol')
+                              .tail(max_trades_per_symbol))
 
     symbol_idx = pd.Series(np.arange(len(sample)), index=sample)
 
-    for symbol, sym_round_trips in sample_round_trips.groupby('symbol'):
-        for _, row in sym_round_trips.iterrows():
-            c = 'b' if row.long else 'r'
-            y_ix = symbol_idx[symbol] + 0.05
-            ax.plot([row['open_dt'], row['close_dt']],
-                    [y_ix, y_ix], color=c,
-                    linewidth=lsize, solid_capstyle='butt')
+    def to_num(dts):
+        dts = pd.DatetimeIndex(dts)
+        if dts.tz is not None:
+            dts = dts.tz_convert('UTC').tz_localize(None)
+        return mdates.date2num(dts.values)
+
+    # Draw all round trips of one direction as a single collection
+    # instead of one line per round trip.
+    y_ix = symbol_idx.reindex(sample_round_trips.symbol).values + 0.05
+    segments = np.stack([
+        np.column_stack([to_num(sample_round_trips['open_dt']), y_ix]),
+        np.column_stack([to_num(sample_round_trips['close_dt']), y_ix]),
+    ], axis=1)
+    long = sample_round_trips['long'].values.astype(bool)
+    for mask, c in [(long, 'b'), (~long, 'r')]:
+        ax.add_collection(LineCollection(segments[mask], colors=c,
+                                         linewidths=lsize,
+                                         capstyle='butt'))
+    ax.xaxis_date()
+    ax.autoscale_view()
 
     ax.set_yticks(range(len(sample)))
     ax.set_yticklabels([utils.format_asset(s) for s in sample])
@@ -1808,6 +1852,8 @@ def show_profit_attribution(round_trips):
         The axes that were plotted on.
     """
 
+    round_trips = expand_round_trips(round_trips)
+
     total_pnl = round_trips['pnl'].sum()
     pnl_attribution = round_trips.groupby('symbol')['pnl'].sum() / total_pnl
     pnl_attribution.name = ''
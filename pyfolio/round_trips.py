@@ -14,8 +14,12 @@
 # limitations under the License.
 from __future__ import division
 from math import copysign
+import heapq
+import os
 import warnings
 from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 import pandas as pd
 import numpy as np
@@ -56,6 +60,18 @@ RETURN_STATS = OrderedDict(
      ('Largest losing trade', 'min'),
      ])
 
+MAE_STATS = OrderedDict(
+    [('Avg MAE', 'mean'),
+     ('Median MAE', 'median'),
+     ('Largest MAE', 'min'),
+     ])
+
+MFE_STATS = OrderedDict(
+    [('Avg MFE', 'mean'),
+     ('Median MFE', 'median'),
+     ('Largest MFE', 'max'),
+     ])
+
 DURATION_STATS = OrderedDict(
     [('Avg duration', lambda x: x.mean()),
      ('Median duration', lambda x: x.median()),
@@ -90,6 +106,220 @@ def agg_all_long_short(round_trips, col, stats_dict):
     return stats_all.join(stats_long_short)
 
 
+def _group_primitives(values, codes, n_groups):
+    """Compute the building blocks of the round-trip statistics for all
+    groups at once.
+
+    Values are sorted once by (group, value), so that within a group
+    losers, even trades and winners are contiguous. Sums, counts,
+    medians and extremes then follow from NumPy reductions over group
+    offsets instead of repeated boolean masking per group.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Float values, NaN values are ignored (except for size).
+    codes : np.ndarray
+        Group code in [0, n_groups) of each value.
+    n_groups : int
+        Number of groups.
+
+    Returns
+    -------
+    primitives : dict
+        Arrays of length n_groups.
+    """
+
+    size = np.bincount(codes, minlength=n_groups)
+
+    valid = ~np.isnan(values)
+    order = np.lexsort((values[valid], codes[valid]))
+    values = values[valid][order]
+    codes = codes[valid][order]
+
+    wins = values > 0
+    losses = values < 0
+
+    count = np.bincount(codes, minlength=n_groups)
+    win_count = np.bincount(codes[wins], minlength=n_groups)
+    loss_count = np.bincount(codes[losses], minlength=n_groups)
+    starts = np.cumsum(count) - count
+    ends = starts + count
+
+    total = np.bincount(codes, weights=values, minlength=n_groups)
+    win_sum = np.bincount(codes[wins], weights=values[wins],
+                          minlength=n_groups)
+    loss_sum = np.bincount(codes[losses], weights=values[losses],
+                           minlength=n_groups)
+
+    def nth(ix, n):
+        out = np.full(n_groups, np.nan)
+        nonempty = n > 0
+        out[nonempty] = values[ix[nonempty]]
+        return out
+
+    def median(start, n):
+        return (nth(start + (n - 1) // 2, n) + nth(start + n // 2, n)) / 2
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'size': size,
+            'count': count,
+            'win_count': win_count,
+            'loss_count': loss_count,
+            'even_count': count - win_count - loss_count,
+            'sum': total,
+            'win_sum': win_sum,
+            'loss_sum': loss_sum,
+            'mean': np.where(count > 0, total / count, np.nan),
+            'win_mean': np.where(win_count > 0, win_sum / win_count, np.nan),
+            'loss_mean': np.where(loss_count > 0, loss_sum / loss_count,
+                                  np.nan),
+            'median': median(starts, count),
+            'win_median': median(ends - win_count, win_count),
+            'loss_median': median(starts, loss_count),
+            'max': nth(ends - 1, count),
+            'min': nth(starts, count),
+        }
+
+
+def _nan_div(num, denom):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denom != 0, num / denom, np.nan)
+
+
+# Vectorized counterparts of PNL_STATS, SUMMARY_STATS, RETURN_STATS,
+# MAE_STATS, MFE_STATS and DURATION_STATS, computed from the output of
+# _group_primitives.
+STAT_KERNELS = {
+    'Total profit': lambda g: g['sum'],
+    'Gross profit': lambda g: g['win_sum'],
+    'Gross loss': lambda g: g['loss_sum'],
+    'Profit factor': lambda g: _nan_div(g['win_sum'], -g['loss_sum']),
+    'Avg. trade net profit': lambda g: g['mean'],
+    'Avg. winning trade': lambda g: g['win_mean'],
+    'Avg. losing trade': lambda g: g['loss_mean'],
+    'Ratio Avg. Win:Avg. Loss': lambda g: _nan_div(g['win_mean'],
+                                                   np.abs(g['loss_mean'])),
+    'Largest winning trade': lambda g: g['max'],
+    'Largest losing trade': lambda g: g['min'],
+    'Total number of round_trips': lambda g: g['count'],
+    'Percent profitable': lambda g: g['win_count'] / g['size'],
+    'Winning round_trips': lambda g: g['win_count'],
+    'Losing round_trips': lambda g: g['loss_count'],
+    'Even round_trips': lambda g: g['even_count'],
+    'Avg returns all round_trips': lambda g: g['mean'],
+    'Avg returns winning': lambda g: g['win_mean'],
+    'Avg returns losing': lambda g: g['loss_mean'],
+    'Median returns all round_trips': lambda g: g['median'],
+    'Median returns winning': lambda g: g['win_median'],
+    'Median returns losing': lambda g: g['loss_median'],
+    'Avg MAE': lambda g: g['mean'],
+    'Median MAE': lambda g: g['median'],
+    'Largest MAE': lambda g: g['min'],
+    'Avg MFE': lambda g: g['mean'],
+    'Median MFE': lambda g: g['median'],
+    'Largest MFE': lambda g: g['max'],
+    'Avg duration': lambda g: g['mean'],
+    'Median duration': lambda g: g['median'],
+    'Longest duration': lambda g: g['max'],
+    'Shortest duration': lambda g: g['min'],
+}
+
+
+def _stat_kernel(name, func):
+    """The STAT_KERNELS entry for name, provided func is the statistic
+    defined under that name in the stats dicts above, else None.
+    """
+    for builtin in (PNL_STATS, SUMMARY_STATS, RETURN_STATS, MAE_STATS,
+                    MFE_STATS, DURATION_STATS):
+        if name not in builtin:
+            continue
+        if builtin[name] is func or (isinstance(func, str) and
+                                     builtin[name] == func):
+            return STAT_KERNELS.get(name)
+    return None
+
+
+def agg_stats(round_trips, col, stats_dict, by=None, primitives=None):
+    """Aggregate round-trip statistics per group in a single pass.
+
+    Equivalent to round_trips.groupby(by)[col].agg(**stats_dict).T, but
+    the statistics of PNL_STATS, SUMMARY_STATS, RETURN_STATS, etc. are
+    derived with their STAT_KERNELS from per-group primitives computed
+    once. Any other statistic, including a custom function under one of
+    their names, falls back to a pandas aggregation.
+
+    Parameters
+    ----------
+    round_trips : pd.DataFrame
+        DataFrame with one row per round trip trade.
+        - See full explanation in round_trips.extract_round_trips
+    col : str
+        Column to compute statistics of.
+    stats_dict : OrderedDict
+        Statistic names and aggregations, e.g. PNL_STATS.
+    by : str or pd.Series (optional)
+        Column (or Series aligned with round_trips) to group by. If
+        None, all round trips form one group.
+    primitives : tuple (optional)
+        Output of a previous call for the same col and by, to reuse
+        when computing several stats_dict.
+
+    Returns
+    -------
+    stats : pd.DataFrame
+        Statistics as rows, groups as columns.
+    primitives : tuple
+        Group labels and primitives, see the primitives parameter.
+    """
+
+    values = round_trips[col]
+    is_duration = pd.api.types.is_timedelta64_dtype(values)
+
+    if by is None:
+        grouper = np.zeros(len(round_trips), dtype=np.intp)
+    elif isinstance(by, pd.Series):
+        grouper = by
+    else:
+        grouper = round_trips[by]
+
+    if primitives is None:
+        if by is None:
+            codes = grouper
+            labels = pd.Index([0])
+        else:
+            codes, labels = pd.factorize(grouper, sort=True)
+            labels = pd.Index(labels, name=grouper.name)
+        if is_duration:
+            values = values.to_numpy(dtype='m8[ns]').view('i8').astype(float)
+            values[round_trips[col].isnull().to_numpy()] = np.nan
+        else:
+            values = values.to_numpy(dtype=float)
+        grouped = codes >= 0
+        primitives = (labels,
+                      _group_primitives(values[grouped], codes[grouped],
+                                        len(labels)))
+
+    labels, g = primitives
+
+    stats = OrderedDict()
+    for name, func in stats_dict.items():
+        kernel = _stat_kernel(name, func)
+        if kernel is not None:
+            stat = kernel(g)
+            if is_duration:
+                stat = pd.to_timedelta(np.trunc(stat), unit='ns')
+            stats[name] = stat
+        else:
+            stats[name] = (round_trips[col].groupby(grouper).agg(func)
+                           .reindex(labels).values)
+
+    stats = pd.DataFrame(stats, index=labels).T
+
+    return stats, primitives
+
+
 def _groupby_consecutive(txn, max_delta=pd.Timedelta('8h')):
     """Merge transactions of the same direction separated by less than
     max_delta time duration.
@@ -110,52 +340,358 @@ def _groupby_consecutive(txn, max_delta=pd.Timedelta('8h')):
     transactions : pd.DataFrame
 
     """
-    def vwap(transaction):
-        if transaction.amount.sum() == 0:
-            warnings.warn('Zero transacted shares, setting vwap to nan.')
-            return np.nan
-        return (transaction.amount * transaction.price).sum() / \
-            transaction.amount.sum()
-
-    out = []
-    for _, t in txn.groupby('symbol'):
-        t = t.sort_index()
-        t.index.name = 'dt'
-        t = t.reset_index()
-
-        t['order_sign'] = t.amount > 0
-        t['block_dir'] = (t.order_sign.shift(
-            1) != t.order_sign).astype(int).cumsum()
-        t['block_time'] = ((t.dt.sub(t.dt.shift(1))) >
-                           max_delta).astype(int).cumsum()
-        grouped_price = (t.groupby(['block_dir',
-                                   'block_time'])
-                          .apply(vwap))
-        grouped_price.name = 'price'
-        grouped_rest = t.groupby(['block_dir', 'block_time']).agg({
-            'amount': 'sum',
-            'symbol': 'first',
-            'dt': 'first'})
-
-        grouped = grouped_rest.join(grouped_price)
-
-        out.append(grouped)
-
-    out = pd.concat(out)
-    out = out.set_index('dt')
+    txn = txn.rename_axis('dt').reset_index()
+    txn = txn.sort_values(['symbol', 'dt'], kind='mergesort')
+
+    # A new block starts whenever the symbol or the order direction
+    # changes, or when transactions are more than max_delta apart.
+    order_sign = txn.amount > 0
+    block = ((txn.symbol != txn.symbol.shift(1)) |
+             (order_sign != order_sign.shift(1)) |
+             (txn.dt.diff() > max_delta)).cumsum()
+
+    grouped = (txn.assign(notional=txn.amount * txn.price)
+               .groupby(block.values, sort=False)
+               .agg(amount=('amount', 'sum'),
+                    symbol=('symbol', 'first'),
+                    dt=('dt', 'first'),
+                    notional=('notional', 'sum')))
+
+    zero_amount = grouped.amount == 0
+    if zero_amount.any():
+        warnings.warn('Zero transacted shares, setting vwap to nan.')
+    grouped['price'] = (grouped.notional /
+                        grouped.amount.where(~zero_amount))
+
+    out = grouped.drop('notional', axis='columns').set_index('dt')
     return out
 
 
+class _FIFOLots(object):
+    """Open lots of a single symbol, closed in first-in, first-out
+    order. Each lot is a [open_dt, signed_price, shares] list; all open
+    lots share the same direction.
+    """
+
+    def __init__(self, lots=()):
+        self._lots = deque()
+        for lot in lots:
+            self.push(list(lot))
+
+    def __len__(self):
+        return len(self._lots)
+
+    def push(self, lot):
+        self._lots.append(lot)
+
+    def peek(self):
+        return self._lots[0]
+
+    def pop(self):
+        return self._lots.popleft()
+
+    def lots(self):
+        """Open lots, oldest first."""
+        return list(self._lots)
+
+
+class _LIFOLots(_FIFOLots):
+    """Open lots closed in last-in, first-out order."""
+
+    def peek(self):
+        return self._lots[-1]
+
+    def pop(self):
+        return self._lots.pop()
+
+
+class _HIFOLots(_FIFOLots):
+    """Open lots closed highest-cost first: the long lot bought at the
+    highest price, or the short lot sold at the lowest price, is closed
+    first. Ties are closed in FIFO-order.
+    """
+
+    def __init__(self, lots=()):
+        self._heap = []
+        self._count = 0
+        super(_HIFOLots, self).__init__(lots)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, lot):
+        # Signed prices are positive for long and negative for short
+        # lots, so the largest signed price is the least profitable lot.
+        heapq.heappush(self._heap, (-lot[1], self._count, lot))
+        self._count += 1
+
+    def peek(self):
+        return self._heap[0][2]
+
+    def pop(self):
+        return heapq.heappop(self._heap)[2]
+
+    def lots(self):
+        return [lot for _, _, lot in sorted(self._heap,
+                                            key=lambda x: x[1])]
+
+
+class _AverageCostLots(_FIFOLots):
+    """Open lots merged into a single lot at the average price of the
+    position. The lot keeps the date on which the position was opened.
+    """
+
+    def push(self, lot):
+        if len(self._lots) == 0:
+            self._lots.append(lot)
+        else:
+            avg = self._lots[0]
+            shares = avg[2] + lot[2]
+            avg[1] = (avg[1] * avg[2] + lot[1] * lot[2]) / shares
+            avg[2] = shares
+
+
+LOT_MATCHING = {
+    'fifo': _FIFOLots,
+    'lifo': _LIFOLots,
+    'hifo': _HIFOLots,
+    'average': _AverageCostLots,
+}
+
+
+def _match_round_trips(sym, trans_sym, lots=None, matching='fifo',
+                       tolerance=0):
+    """Match the transactions of a single symbol into round trips.
+
+    Open positions are kept as lots of [open_dt, signed_price, shares]
+    rather than as one entry per share, so that memory and time scale
+    with the number of transactions instead of the number of shares.
+    Lots are split when only partially closed.
+
+    Parameters
+    ----------
+    sym : object
+        Symbol of the transactions.
+    trans_sym : pd.DataFrame
+        Transactions of a single symbol, sorted by time, with
+        signed_price and abs_amount columns.
+    lots : list (optional)
+        Lots that were still open before trans_sym, oldest first.
+    matching : str (optional)
+        Order in which open lots are closed, one of LOT_MATCHING.
+    tolerance : float (optional)
+        Quantities up to tolerance are treated as zero, so that
+        fractional quantities do not leave lots open because of
+        floating point residuals.
+
+    Returns
+    -------
+    roundtrips : list
+        One dict per round trip.
+    lots : list
+        Lots that are still open after trans_sym, oldest first.
+    """
+
+    roundtrips = []
+    lots = LOT_MATCHING[matching](lots or [])
+
+    for dt, t in trans_sym.iterrows():
+        if t.price < 0:
+            warnings.warn('Negative price detected, ignoring for'
+                          'round-trip.')
+            continue
+
+        price = t.signed_price
+        remaining = t.abs_amount
+        if remaining <= tolerance:
+            continue
+
+        if (len(lots) == 0) or \
+           (copysign(1, lots.peek()[1]) == copysign(1, t.amount)):
+            lots.push([dt, price, remaining])
+            continue
+
+        # Close round-trip
+        pnl = 0
+        invested = 0
+        shares = 0
+        open_dt = lots.peek()[0]
+
+        while remaining > tolerance and len(lots) != 0:
+            lot = lots.peek()
+            prev_price = lot[1]
+            matched = min(remaining, lot[2])
+
+            pnl += -(price + prev_price) * matched
+            invested += abs(prev_price) * matched
+            shares += matched
+
+            remaining -= matched
+            if lot[2] - matched <= tolerance:
+                lots.pop()
+            else:
+                # Partially closed lot, keep the rest open
+                lot[2] -= matched
+
+        if remaining > tolerance:
+            # Position crossed zero, open a lot in the other direction
+            lots.push([dt, price, remaining])
+
+        roundtrips.append({'pnl': pnl,
+                           'open_dt': open_dt,
+                           'close_dt': dt,
+                           'long': price < 0,
+                           'rt_returns': pnl / invested,
+                           'symbol': sym,
+                           'open_price': invested / shares,
+                           })
+
+    return roundtrips, lots.lots()
+
+
+def _match_round_trips_chunk(by_symbol, matching='fifo', fractional=False,
+                             tolerance=1e-8):
+    """Match round trips for a list of (symbol, transactions, open lots)
+    triples. Returns one (round trips, open lots) pair per symbol.
+
+    Defined at module level so that it can be sent to worker processes.
+    """
+
+    matched = []
+    for sym, trans_sym, lots in by_symbol:
+        trans_sym = trans_sym.sort_index()
+        trans_sym['signed_price'] = trans_sym.price * \
+            np.sign(trans_sym.amount)
+        if fractional:
+            trans_sym['abs_amount'] = trans_sym.amount.abs()
+        else:
+            trans_sym['abs_amount'] = trans_sym.amount.abs().astype(int)
+        matched.append(_match_round_trips(
+            sym, trans_sym, lots, matching=matching,
+            tolerance=tolerance if fractional else 0))
+
+    return matched
+
+
+def _partition_symbols(by_symbol, n_chunks):
+    """Distribute (symbol, transactions, open lots) triples over n_chunks
+    chunks with a roughly equal number of transactions each (longest
+    first).
+    """
+
+    chunks = [[] for _ in range(n_chunks)]
+    loads = [(0, i) for i in range(n_chunks)]
+    order = sorted(range(len(by_symbol)),
+                   key=lambda i: len(by_symbol[i][1]), reverse=True)
+    for i in order:
+        load, chunk = heapq.heappop(loads)
+        chunks[chunk].append(by_symbol[i])
+        heapq.heappush(loads, (load + len(by_symbol[i][1]), chunk))
+
+    return [chunk for chunk in chunks if chunk]
+
+
+def _range_min_max(values, lo, hi):
+    """Minimum and maximum of values[lo[i]:hi[i] + 1] for every i,
+    ignoring NaNs, using a sparse table: O(n log n) to build and O(1)
+    per query. Requires lo <= hi.
+    """
+
+    length = hi - lo + 1
+    levels = np.frexp(length)[1] - 1  # floor(log2(length))
+
+    mins = np.empty(len(lo))
+    maxs = np.empty(len(lo))
+
+    level_min = level_max = values
+    for level in range(levels.max() + 1 if len(lo) else 0):
+        if level > 0:
+            half = 1 << (level - 1)
+            level_min = np.fmin(level_min[:-half], level_min[half:])
+            level_max = np.fmax(level_max[:-half], level_max[half:])
+        at_level = levels == level
+        if not at_level.any():
+            continue
+        # Two overlapping blocks of length 2 ** level cover the range
+        start = lo[at_level]
+        end = hi[at_level] - (1 << level) + 1
+        mins[at_level] = np.fmin(level_min[start], level_min[end])
+        maxs[at_level] = np.fmax(level_max[start], level_max[end])
+
+    return mins, maxs
+
+
+def _round_trip_excursions(round_trips, open_price, prices):
+    """Maximum adverse and favorable excursion of round trips, as
+    returns relative to open_price.
+
+    Parameters
+    ----------
+    round_trips : pd.DataFrame
+        Round trips, see extract_round_trips.
+    open_price : pd.Series
+        Average entry price of each round trip.
+    prices : pd.DataFrame
+        Prices, one column per symbol.
+
+    Returns
+    -------
+    mae, mfe : np.ndarray
+        NaN for round trips without prices while open.
+    """
+
+    prices = prices.sort_index()
+    index = prices.index
+    open_dt = pd.DatetimeIndex(round_trips['open_dt'])
+    close_dt = pd.DatetimeIndex(round_trips['close_dt'])
+    if (index == index.normalize()).all():
+        open_dt = open_dt.normalize()
+        close_dt = close_dt.normalize()
+
+    lo = index.searchsorted(open_dt, side='left')
+    hi = index.searchsorted(close_dt, side='right') - 1
+
+    low = np.full(len(round_trips), np.nan)
+    high = np.full(len(round_trips), np.nan)
+    # Sort the round trips with prices while open by symbol once, so
+    # that each symbol's round trips are a contiguous slice
+    codes, symbols = pd.factorize(round_trips['symbol'])
+    rows = np.flatnonzero((codes >= 0) & (lo <= hi))
+    rows = rows[np.argsort(codes[rows], kind='stable')]
+    counts = np.bincount(codes[rows], minlength=len(symbols))
+    ends = np.cumsum(counts)
+    for code, sym in enumerate(symbols):
+        if not counts[code] or sym not in prices.columns:
+            continue
+        sym_rows = rows[ends[code] - counts[code]:ends[code]]
+        low[sym_rows], high[sym_rows] = _range_min_max(
+            prices[sym].to_numpy(dtype=float), lo[sym_rows], hi[sym_rows])
+
+    long = round_trips['long'].to_numpy(dtype=bool)
+    open_price = open_price.to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        worst = np.where(long, low / open_price - 1, 1 - high / open_price)
+        best = np.where(long, high / open_price - 1, 1 - low / open_price)
+
+    return np.minimum(worst, 0), np.maximum(best, 0)
+
+
 def extract_round_trips(transactions,
-                        portfolio_value=None):
+                        portfolio_value=None,
+                        n_jobs=1,
+                        matching='fifo',
+                        fractional=False,
+                        tolerance=1e-8,
+                        prices=None):
     """Group transactions into "round trips". First, transactions are
     grouped by day and directionality. Then, long and short
     transactions are matched to create round-trip round_trips for which
     PnL, duration and returns are computed. Crossings where a position
     changes from long to short and vice-versa are handled correctly.
 
-    Under the hood, we reconstruct the individual shares in a
-    portfolio over time and match round_trips in a FIFO-order.
+    Under the hood, we reconstruct the open lots in a portfolio over
+    time and match round_trips in a FIFO-order (or the order given by
+    matching).
 
     For example, the following transactions would constitute one round trip:
     index                  amount   price    symbol
@@ -186,6 +722,39 @@ def extract_round_trips(transactions,
         Portfolio value (all net assets including cash) over time.
         Note that portfolio_value needs to beginning of day, so either
         use .shift() or positions.sum(axis='columns') / (1+returns).
+        Round trips closed on a date missing from portfolio_value use
+        the last portfolio value before that date.
+
+    n_jobs : int (optional)
+        Number of worker processes used to match round trips. Symbols
+        are matched independently and distributed over the workers in
+        chunks of roughly equal size. If None or negative, use all
+        available CPUs. Default is 1 (no parallelism).
+
+    matching : str (optional)
+        Order in which open lots are closed by an opposite transaction:
+        - 'fifo': oldest lot first (default).
+        - 'lifo': most recent lot first.
+        - 'hifo': highest-cost lot first, i.e. the long lot bought at
+          the highest price or the short lot sold at the lowest price.
+        - 'average': all open lots are merged at their average price.
+
+    fractional : bool (optional)
+        If True, match quantities as floats, e.g. for crypto or
+        fractional shares. By default, quantities are truncated to
+        whole shares.
+
+    tolerance : float (optional)
+        With fractional quantities, remaining quantities up to
+        tolerance are treated as fully closed. Default is 1e-8.
+
+    prices : pd.DataFrame (optional)
+        Daily or intraday prices, one column per symbol. If passed,
+        add the maximum adverse (mae) and maximum favorable (mfe)
+        excursion of each round trip, i.e. the worst and best
+        unrealized return relative to the average entry price over
+        the prices between open_dt and close_dt. With daily prices,
+        round trips are matched to prices by date.
 
     Returns
     -------
@@ -196,81 +765,362 @@ def extract_round_trips(transactions,
         into that partiulcar round-trip.
     """
 
-    transactions = _groupby_consecutive(transactions)
-    roundtrips = []
+    roundtrips, _ = _extract_round_trips(transactions,
+                                         portfolio_value=portfolio_value,
+                                         n_jobs=n_jobs,
+                                         matching=matching,
+                                         fractional=fractional,
+                                         tolerance=tolerance,
+                                         prices=prices)
 
-    for sym, trans_sym in transactions.groupby('symbol'):
-        trans_sym = trans_sym.sort_index()
-        price_stack = deque()
-        dt_stack = deque()
-        trans_sym['signed_price'] = trans_sym.price * \
-            np.sign(trans_sym.amount)
-        trans_sym['abs_amount'] = trans_sym.amount.abs().astype(int)
-        for dt, t in trans_sym.iterrows():
-            if t.price < 0:
-                warnings.warn('Negative price detected, ignoring for'
-                              'round-trip.')
-                continue
-
-            indiv_prices = [t.signed_price] * t.abs_amount
-            if (len(price_stack) == 0) or \
-               (copysign(1, price_stack[-1]) == copysign(1, t.amount)):
-                price_stack.extend(indiv_prices)
-                dt_stack.extend([dt] * len(indiv_prices))
-            else:
-                # Close round-trip
-                pnl = 0
-                invested = 0
-                cur_open_dts = []
-
-                for price in indiv_prices:
-                    if len(price_stack) != 0 and \
-                       (copysign(1, price_stack[-1]) != copysign(1, price)):
-                        # Retrieve first dt, stock-price pair from
-                        # stack
-                        prev_price = price_stack.popleft()
-                        prev_dt = dt_stack.popleft()
-
-                        pnl += -(price + prev_price)
-                        cur_open_dts.append(prev_dt)
-                        invested += abs(prev_price)
-
-                    else:
-                        # Push additional stock-prices onto stack
-                        price_stack.append(price)
-                        dt_stack.append(dt)
-
-                roundtrips.append({'pnl': pnl,
-                                   'open_dt': cur_open_dts[0],
-                                   'close_dt': dt,
-                                   'long': price < 0,
-                                   'rt_returns': pnl / invested,
-                                   'symbol': sym,
-                                   })
-
-    roundtrips = pd.DataFrame(roundtrips)
+    return roundtrips
+
+
+def extract_round_trips_incremental(transactions,
+                                    open_lots=None,
+                                    portfolio_value=None,
+                                    n_jobs=1,
+                                    matching='fifo',
+                                    fractional=False,
+                                    tolerance=1e-8,
+                                    prices=None):
+    """Resumable version of extract_round_trips. Matches new
+    transactions against the lots left open by a previous call and
+    returns only the round trips closed by the new transactions,
+    together with the lots that remain open.
+
+    This allows round trips to be maintained over a growing
+    transaction history (e.g. nightly) at a cost proportional to the
+    new transactions rather than the full history:
+
+    >>> rts, lots = extract_round_trips_incremental(txn_until_yesterday)
+    >>> new_rts, lots = extract_round_trips_incremental(txn_today, lots)
+
+    Note that transactions are only merged by _groupby_consecutive
+    within a single call. A batch boundary that falls inside a block of
+    same-direction transactions splits it into two lots, each at its
+    own average price, where extract_round_trips would open one lot at
+    the average price of the whole block. Round trips that partially
+    close such a block can then differ from extract_round_trips in
+    number, pnl and rt_returns, and with matching other than 'fifo' the
+    order in which lots are closed can change as well. Total PnL agrees
+    once the positions involved are fully closed.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame
+        Prices and amounts of executed trades that occurred after the
+        ones used to compute open_lots. One row per trade.
+        - See full explanation in tears.create_full_tear_sheet
+
+    open_lots : pd.DataFrame (optional)
+        Open lots returned by a previous call. If None, start from a
+        flat book.
+
+    portfolio_value : pd.Series (optional)
+        Portfolio value (all net assets including cash) over time.
+        - See full explanation in round_trips.extract_round_trips
+
+    n_jobs : int (optional)
+        Number of worker processes used to match round trips.
+        - See full explanation in round_trips.extract_round_trips
+
+    matching : str (optional)
+        Order in which open lots are closed. Should be the same as the
+        one used to compute open_lots.
+        - See full explanation in round_trips.extract_round_trips
+
+    fractional : bool (optional)
+        If True, match quantities as floats.
+        - See full explanation in round_trips.extract_round_trips
+
+    tolerance : float (optional)
+        Tolerance for fractional quantities.
+        - See full explanation in round_trips.extract_round_trips
+
+    prices : pd.DataFrame (optional)
+        Prices used to compute excursions.
+        - See full explanation in round_trips.extract_round_trips
+
+    Returns
+    -------
+    round_trips : pd.DataFrame
+        DataFrame with one row per round trip closed by transactions.
+        - See full explanation in round_trips.extract_round_trips
+
+    open_lots : pd.DataFrame
+        Lots still open after transactions, oldest first per symbol,
+        with symbol, open_dt, amount (signed) and price columns. Can be
+        stored (e.g. with to_csv or to_parquet) and passed to the next
+        call.
+    """
+
+    if open_lots is None:
+        lots = {}
+    else:
+        lots = {sym: list(zip(sym_lots.open_dt,
+                              sym_lots.price * np.sign(sym_lots.amount),
+                              sym_lots.amount.abs()))
+                for sym, sym_lots in open_lots.groupby('symbol',
+                                                       sort=False)}
+
+    roundtrips, lots = _extract_round_trips(transactions,
+                                            portfolio_value=portfolio_value,
+                                            n_jobs=n_jobs,
+                                            matching=matching,
+                                            fractional=fractional,
+                                            tolerance=tolerance,
+                                            open_lots=lots,
+                                            prices=prices)
+
+    open_lots = pd.DataFrame(
+        [(sym, dt, -shares if copysign(1, price) < 0 else shares,
+          abs(price))
+         for sym, sym_lots in lots.items()
+         for dt, price, shares in sym_lots],
+        columns=['symbol', 'open_dt', 'amount', 'price'])
+
+    return roundtrips, open_lots
+
+
+def _extract_round_trips(transactions, portfolio_value=None, n_jobs=1,
+                         matching='fifo', fractional=False, tolerance=1e-8,
+                         open_lots=None, prices=None):
+    """Match transactions into round trips, starting from open_lots (a
+    dict of symbol to open lots) if given.
+
+    Returns
+    -------
+    roundtrips : pd.DataFrame
+        See extract_round_trips.
+    open_lots : dict
+        Symbol to lots still open after transactions, oldest first.
+    """
+
+    if matching not in LOT_MATCHING:
+        raise ValueError(
+            "Unexpected value for matching '{}'. The matching parameter "
+            "must be one of {}.".format(matching, sorted(LOT_MATCHING)))
+
+    if open_lots is None:
+        open_lots = {}
+
+    transactions = _groupby_consecutive(transactions)
+    by_symbol = [(sym, trans_sym, open_lots.get(sym))
+                 for sym, trans_sym in transactions.groupby('symbol')]
+
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(by_symbol))
+
+    match_chunk = partial(_match_round_trips_chunk, matching=matching,
+                          fractional=fractional, tolerance=tolerance)
+
+    if n_jobs <= 1:
+        sym_matched = match_chunk(by_symbol)
+    else:
+        chunks = _partition_symbols(by_symbol, n_jobs)
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(match_chunk, chunks))
+        # Reassemble in symbol order so that the output does not depend
+        # on how symbols were distributed across workers.
+        matched = {}
+        for chunk, chunk_matched in zip(chunks, results):
+            for (sym, _, _), sym_result in zip(chunk, chunk_matched):
+                matched[sym] = sym_result
+        sym_matched = [matched[sym] for sym, _, _ in by_symbol]
+
+    roundtrips = [rt for rts, _ in sym_matched for rt in rts]
+
+    # Symbols without new transactions keep their lots unchanged
+    open_lots = dict(open_lots)
+    for (sym, _, _), (_, lots) in zip(by_symbol, sym_matched):
+        open_lots[sym] = lots
+    open_lots = {sym: lots for sym, lots in open_lots.items() if lots}
+
+    roundtrips = pd.DataFrame(roundtrips,
+                              columns=['pnl', 'open_dt', 'close_dt', 'long',
+                                       'rt_returns', 'symbol', 'open_price'])
+    open_price = roundtrips.pop('open_price')
 
     roundtrips['duration'] = roundtrips['close_dt'].sub(roundtrips['open_dt'])
 
-    if portfolio_value is not None:
-        # Need to normalize so that we can join
-        pv = pd.DataFrame(portfolio_value,
-                          columns=['portfolio_value'])\
-            .assign(date=portfolio_value.index)
+    if portfolio_value is not None and len(roundtrips) == 0:
+        roundtrips['returns'] = np.nan
+    elif portfolio_value is not None:
+        # Use the portfolio value of the close date, or of the last
+        # date before it if the round trip closed on a non-trading day.
+        pv = portfolio_value.set_axis(
+            portfolio_value.index.normalize()).sort_index()
+        close_date = roundtrips['close_dt'].dt.normalize()
+        loc = pv.index.searchsorted(close_date, side='right') - 1
 
-        roundtrips['date'] = roundtrips.close_dt.apply(lambda x:
-                                                       x.replace(hour=0,
-                                                                 minute=0,
-                                                                 second=0))
+        pv_at_close = np.where(loc >= 0, pv.values[loc], np.nan)
+        roundtrips['returns'] = roundtrips.pnl / pv_at_close
 
-        tmp = (roundtrips.set_index('date')
-                         .join(pv.set_index('date'), lsuffix='_')
-                         .reset_index())
+    if prices is not None:
+        roundtrips['mae'], roundtrips['mfe'] = _round_trip_excursions(
+            roundtrips, open_price, prices)
 
-        roundtrips['returns'] = tmp.pnl / tmp.portfolio_value
-        roundtrips = roundtrips.drop('date', axis='columns')
+    return roundtrips, open_lots
 
-    return roundtrips
+
+def _is_compact(round_trips):
+    return ('close_dt' in round_trips and
+            pd.api.types.is_integer_dtype(round_trips['close_dt']))
+
+
+def compact_round_trips(round_trips):
+    """Convert round trips to a compact columnar representation, e.g.
+    to keep very large results in memory or store them on disk.
+
+    Symbols are stored as categoricals, open_dt and close_dt as int64
+    nanoseconds since the epoch (UTC), pnl and returns as float32, and
+    duration is dropped since it can be recomputed. The time zone of
+    the timestamps is kept in the frame's attrs.
+
+    Parameters
+    ----------
+    round_trips : pd.DataFrame
+        DataFrame with one row per round trip trade.
+        - See full explanation in round_trips.extract_round_trips
+
+    Returns
+    -------
+    compact : pd.DataFrame
+        Compact round trips. Accepted wherever round trips are, and
+        converted back by expand_round_trips.
+    """
+
+    if _is_compact(round_trips):
+        return round_trips
+
+    compact = round_trips.drop('duration', axis='columns', errors='ignore')
+
+    tz = None
+    for col in ['open_dt', 'close_dt']:
+        dts = pd.DatetimeIndex(compact[col])
+        if dts.tz is not None:
+            tz = str(dts.tz)
+            dts = dts.tz_convert('UTC').tz_localize(None)
+        compact[col] = dts.as_unit('ns').asi8
+
+    compact['symbol'] = compact['symbol'].astype('category')
+    compact['long'] = compact['long'].astype(bool)
+    for col in ['pnl', 'rt_returns', 'returns', 'mae', 'mfe']:
+        if col in compact:
+            compact[col] = compact[col].astype(np.float32)
+
+    compact.attrs['tz'] = tz
+
+    return compact
+
+
+def expand_round_trips(round_trips):
+    """Convert round trips created by compact_round_trips back to the
+    representation returned by extract_round_trips. Round trips that
+    are not compact are returned unchanged.
+
+    Parameters
+    ----------
+    round_trips : pd.DataFrame
+        Compact round trips.
+
+    Returns
+    -------
+    round_trips : pd.DataFrame
+        DataFrame with one row per round trip trade.
+        - See full explanation in round_trips.extract_round_trips
+    """
+
+    if not _is_compact(round_trips):
+        return round_trips
+
+    tz = round_trips.attrs.get('tz')
+    expanded = round_trips.copy(deep=False)
+    for col in ['open_dt', 'close_dt']:
+        dts = pd.DatetimeIndex(expanded[col].values.view('M8[ns]'))
+        if tz is not None:
+            dts = dts.tz_localize('UTC').tz_convert(tz)
+        expanded[col] = dts
+
+    expanded['symbol'] = expanded['symbol'].astype(object)
+    expanded.insert(expanded.columns.get_loc('symbol') + 1,
+                    'duration',
+                    expanded['close_dt'] - expanded['open_dt'])
+
+    return expanded
+
+
+def _is_parquet(path):
+    return str(path).lower().endswith(('.parquet', '.pq'))
+
+
+def save_round_trips(round_trips, path):
+    """Save round trips in compact form to a Parquet file (if path ends
+    in .parquet or .pq) or an uncompressed Arrow IPC file (otherwise,
+    e.g. .arrow or .feather), which can be memory-mapped when loaded.
+
+    Requires pyarrow.
+
+    Parameters
+    ----------
+    round_trips : pd.DataFrame
+        Round trips, either as returned by extract_round_trips or
+        compact_round_trips.
+    path : str or path-like
+        File to write.
+    """
+
+    import pyarrow as pa
+
+    compact = compact_round_trips(round_trips)
+
+    table = pa.Table.from_pandas(compact, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'pyfolio.tz'] = (compact.attrs.get('tz') or '').encode()
+    table = table.replace_schema_metadata(metadata)
+
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path, compression='uncompressed')
+
+
+def load_round_trips(path, compact=False):
+    """Load round trips saved by save_round_trips.
+
+    Parameters
+    ----------
+    path : str or path-like
+        File to read, see save_round_trips.
+    compact : bool (optional)
+        If True, return the compact representation, see
+        compact_round_trips. Otherwise expand the round trips to the
+        representation returned by extract_round_trips.
+
+    Returns
+    -------
+    round_trips : pd.DataFrame
+        DataFrame with one row per round trip trade.
+    """
+
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, memory_map=True)
+
+    round_trips = table.to_pandas()
+    tz = (table.schema.metadata or {}).get(b'pyfolio.tz', b'').decode()
+    round_trips.attrs['tz'] = tz or None
+
+    if compact:
+        return round_trips
+    return expand_round_trips(round_trips)
 
 
 def add_closing_transactions(positions, transactions):
@@ -301,22 +1151,20 @@ def add_closing_transactions(positions, transactions):
     # they don't conflict with other round_trips executed at that time.
     end_dt = open_pos.name + pd.Timedelta(seconds=1)
 
-    for sym, ending_val in open_pos.items():
-        txn_sym = transactions[transactions.symbol == sym]
+    if len(open_pos) > 0:
+        ending_amount = (transactions.groupby('symbol').amount.sum()
+                         .reindex(open_pos.index, fill_value=0))
 
-        ending_amount = txn_sym.amount.sum()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ending_price = open_pos / ending_amount
 
-        ending_price = ending_val / ending_amount
-        closing_txn = OrderedDict([
-            ('amount', -ending_amount),
-            ('price', ending_price),
-            ('symbol', sym),
-        ])
+        closing_txns = pd.DataFrame(OrderedDict([
+            ('amount', -ending_amount.values),
+            ('price', ending_price.values),
+            ('symbol', open_pos.index),
+        ]), index=pd.DatetimeIndex([end_dt] * len(open_pos)))
 
-        closing_txn = pd.DataFrame(closing_txn, index=[end_dt])
-        closed_txns = pd.concat([
-            closed_txns,
-            closing_txn])
+        closed_txns = pd.concat([closed_txns, closing_txns])
 
     closed_txns = closed_txns[closed_txns.amount != 0]
 
@@ -342,15 +1190,34 @@ def apply_sector_mappings_to_round_trips(round_trips, sector_mappings):
         Round trips with symbol names replaced by sector names.
     """
 
-    sector_round_trips = round_trips.copy()
-    sector_round_trips.symbol = sector_round_trips.symbol.apply(
-        lambda x: sector_mappings.get(x, 'No Sector Mapping'))
-    sector_round_trips = sector_round_trips.dropna(axis=0)
+    round_trips = expand_round_trips(round_trips)
+
+    # Build the frame around the existing columns instead of copying
+    # them, then swap in the sectors.
+    sector_round_trips = pd.DataFrame(dict(round_trips.items()),
+                                      index=round_trips.index, copy=False)
+    sector_round_trips['symbol'] = _map_sectors(round_trips.symbol,
+                                                sector_mappings)
+
+    keep = sector_round_trips.notnull().all(axis='columns')
+    if not keep.all():
+        sector_round_trips = sector_round_trips[keep]
 
     return sector_round_trips
 
 
-def gen_round_trip_stats(round_trips):
+def _map_sectors(symbols, sector_mappings):
+    """Map symbols to sectors, looking up each distinct symbol once."""
+
+    codes, uniques = pd.factorize(symbols, use_na_sentinel=False)
+    sectors = np.empty(len(uniques), dtype=object)
+    sectors[:] = [sector_mappings.get(x, 'No Sector Mapping')
+                  for x in uniques]
+
+    return pd.Series(sectors[codes], index=symbols.index, name='sector')
+
+
+def gen_round_trip_stats(round_trips, sector_mappings=None):
     """Generate various round-trip statistics.
 
     Parameters
@@ -358,6 +1225,15 @@ def gen_round_trip_stats(round_trips):
     round_trips : pd.DataFrame
         DataFrame with one row per round trip trade.
         - See full explanation in round_trips.extract_round_trips
+    sector_mappings : dict or pd.Series, optional
+        Security identifier to sector mapping.
+        Security ids as keys, sectors as values. If passed, also
+        compute per-sector return ('sectors') and PnL ('sector_pnl')
+        statistics.
+
+    If round_trips has mae and mfe columns (see the prices parameter
+    of extract_round_trips), also compute excursion statistics
+    ('excursions').
 
     Returns
     -------
@@ -370,22 +1246,118 @@ def gen_round_trip_stats(round_trips):
     round_trips.print_round_trip_stats
     """
 
-    stats = {}
-    stats['pnl'] = agg_all_long_short(round_trips, 'pnl', PNL_STATS)
-    stats['summary'] = agg_all_long_short(round_trips, 'pnl',
-                                          SUMMARY_STATS)
-    stats['duration'] = agg_all_long_short(round_trips, 'duration',
-                                           DURATION_STATS)
-    stats['returns'] = agg_all_long_short(round_trips, 'returns',
-                                          RETURN_STATS)
+    round_trips = expand_round_trips(round_trips)
+
+    def all_long_short(col, stats_dicts):
+        # Primitives are computed once per column and shared by all
+        # stats_dicts aggregating that column.
+        prim_all = prim_long_short = None
+        tables = []
+        for stats_dict in stats_dicts:
+            stats_all, prim_all = agg_stats(round_trips, col, stats_dict,
+                                            primitives=prim_all)
+            stats_long_short, prim_long_short = agg_stats(
+                round_trips, col, stats_dict, by='long',
+                primitives=prim_long_short)
+            tables.append(
+                stats_all
+                .rename(columns={0: 'All trades'})
+                .join(stats_long_short
+                      .rename(columns={False: 'Short trades',
+                                       True: 'Long trades'}))
+                .rename_axis(None, axis='columns'))
+        return tables
 
-    stats['symbols'] = \
-        round_trips.groupby('symbol')['returns'].agg(**RETURN_STATS).T
+    stats = {}
+    stats['pnl'], stats['summary'] = all_long_short(
+        'pnl', [PNL_STATS, SUMMARY_STATS])
+    stats['duration'], = all_long_short('duration', [DURATION_STATS])
+    stats['returns'], = all_long_short('returns', [RETURN_STATS])
+
+    if 'mae' in round_trips and 'mfe' in round_trips:
+        stats['excursions'] = pd.concat(
+            all_long_short('mae', [MAE_STATS]) +
+            all_long_short('mfe', [MFE_STATS]))
+
+    stats['symbols'], _ = agg_stats(round_trips, 'returns', RETURN_STATS,
+                                    by='symbol')
+
+    if sector_mappings is not None:
+        sectors = _map_sectors(round_trips.symbol, sector_mappings)
+        stats['sectors'], _ = agg_stats(round_trips, 'returns',
+                                        RETURN_STATS, by=sectors)
+        stats['sector_pnl'], _ = agg_stats(round_trips, 'pnl', PNL_STATS,
+                                           by=sectors)
 
     return stats
 
 
-def print_round_trip_stats(round_trips, hide_pos=False):
+def gen_rolling_round_trip_stats(round_trips, window='90D'):
+    """Generate round-trip PnL statistics over a rolling time window.
+
+    Round trips are sorted by close_dt once, and the statistics of the
+    round trips closed within window up to each close_dt are derived
+    from cumulative sums and counts, so the cost does not grow with
+    the number of windows.
+
+    Parameters
+    ----------
+    round_trips : pd.DataFrame
+        DataFrame with one row per round trip trade.
+        - See full explanation in round_trips.extract_round_trips
+    window : str or pd.Timedelta, optional
+        Length of the rolling window, e.g. '90D'. The window ending at
+        close_dt covers round trips closed after close_dt - window and
+        up to close_dt.
+
+    Returns
+    -------
+    stats : pd.DataFrame
+        One row per distinct close_dt, with the number of round trips,
+        percent profitable, profit factor, average PnL of all, winning
+        and losing round trips, and largest winning and losing PnL of
+        the window.
+    """
+
+    round_trips = expand_round_trips(round_trips)
+    round_trips = round_trips.sort_values('close_dt', kind='mergesort')
+
+    close_dt = pd.DatetimeIndex(round_trips['close_dt'])
+    pnl = round_trips['pnl'].to_numpy(dtype=float)
+
+    # Window i covers rows start[i]..end[i], i.e. all round trips closed
+    # in (close_dt[i] - window, close_dt[i]].
+    ends = close_dt.unique()
+    end = close_dt.searchsorted(ends, side='right') - 1
+    start = close_dt.searchsorted(ends - pd.Timedelta(window), side='right')
+
+    def window_sum(x):
+        cum = np.concatenate([[0], np.cumsum(x)])
+        return cum[end + 1] - cum[start]
+
+    count = window_sum(np.ones_like(pnl))
+    win_count = window_sum(pnl > 0)
+    loss_count = window_sum(pnl < 0)
+    gross_profit = window_sum(np.where(pnl > 0, pnl, 0))
+    gross_loss = window_sum(np.where(pnl < 0, pnl, 0))
+    largest_loss, largest_win = _range_min_max(pnl, start, end)
+
+    return pd.DataFrame(
+        OrderedDict([
+            ('Total number of round_trips', count.astype(int)),
+            ('Percent profitable', win_count / count),
+            ('Profit factor', _nan_div(gross_profit, -gross_loss)),
+            ('Avg. trade net profit', (gross_profit + gross_loss) / count),
+            ('Avg. winning trade', _nan_div(gross_profit, win_count)),
+            ('Avg. losing trade', _nan_div(gross_loss, loss_count)),
+            ('Largest winning trade', largest_win),
+            ('Largest losing trade', largest_loss),
+        ]),
+        index=ends.rename('close_dt'))
+
+
+def print_round_trip_stats(round_trips, hide_pos=False,
+                           sector_mappings=None):
     """Print various round-trip statistics. Tries to pretty-print tables
     with HTML output if run inside IPython NB.
 
@@ -394,13 +1366,19 @@ def print_round_trip_stats(round_trips, hide_pos=False):
     round_trips : pd.DataFrame
         DataFrame with one row per round trip trade.
         - See full explanation in round_trips.extract_round_trips
+    hide_pos : bool, optional
+        If True, do not print per-symbol statistics.
+    sector_mappings : dict or pd.Series, optional
+        Security identifier to sector mapping. If passed, also print
+        per-sector statistics.
 
     See also
     --------
     round_trips.gen_round_trip_stats
     """
 
-    stats = gen_round_trip_stats(round_trips)
+    stats = gen_round_trip_stats(round_trips,
+                                 sector_mappings=sector_mappings)
 
     print_table(stats['summary'], float_format='{:.2f}'.format,
                 name='Summary stats')
@@ -409,8 +1387,17 @@ def print_round_trip_stats(round_trips, hide_pos=False):
                 name='Duration stats')
     print_table(stats['returns'] * 100, float_format='{:.2f}%'.format,
                 name='Return stats')
+    if 'excursions' in stats:
+        print_table(stats['excursions'] * 100,
+                    float_format='{:.2f}%'.format, name='Excursion stats')
 
     if not hide_pos:
         stats['symbols'].columns = stats['symbols'].columns.map(format_asset)
         print_table(stats['symbols'] * 100,
                     float_format='{:.2f}%'.format, name='Symbol stats')
+
+    if sector_mappings is not None:
+        print_table(stats['sector_pnl'], float_format='${:.2f}'.format,
+                    name='Sector PnL stats')
+        print_table(stats['sectors'] * 100,
+                    float_format='{:.2f}%'.format, name='Sector stats')
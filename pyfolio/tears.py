@@ -69,7 +69,8 @@ def create_full_tear_sheet(
     unadjusted_returns: 'pd.Series[float]' = None,
     turnover_denom: str = 'AGB',
     set_context: bool = True,
-    header_rows: dict[str, str] = None
+    header_rows: dict[str, str] = None,
+    risk_factors: pd.DataFrame = None
     ) -> None:
     """
     Generate a number of tear sheets that are useful
@@ -180,6 +181,12 @@ def create_full_tear_sheet(
         If True, set default plotting style context.
 
         - See plotting.context().
+
+    risk_factors : pd.DataFrame, optional
+        Daily noncumulative returns of risk factors (e.g. Fama-French),
+        one column per factor, for the rolling multi-factor betas.
+
+        - See full explanation in create_returns_tear_sheet.
     """
 
     if (unadjusted_returns is None) and (slippage is not None) and\
@@ -201,7 +208,8 @@ def create_full_tear_sheet(
         bootstrap=bootstrap,
         turnover_denom=turnover_denom,
         header_rows=header_rows,
-        set_context=set_context)
+        set_context=set_context,
+        risk_factors=risk_factors)
 
     create_interesting_times_tear_sheet(returns,
                                         benchmark_rets=benchmark_rets,
@@ -453,7 +461,8 @@ def create_returns_tear_sheet(
     bootstrap: bool = False,
     turnover_denom: str = 'AGB',
     header_rows: dict[str, str] = None,
-    return_fig: bool = False
+    return_fig: bool = False,
+    risk_factors: pd.DataFrame = None
     ) -> Union[plt.Figure, None]:
     """
     Generate a number of plots for analyzing a strategy's returns.
@@ -513,6 +522,13 @@ def create_returns_tear_sheet(
 
     return_fig : boolean, optional
         If True, returns the figure that was plotted on.
+
+    risk_factors : pd.DataFrame, optional
+        Daily noncumulative returns of risk factors (e.g. Fama-French),
+        one column per factor. If passed, also plots the rolling betas
+        from a joint multi-factor regression.
+
+        - This is in the same style as returns.
     """
 
     if benchmark_rets is not None:
@@ -537,6 +553,9 @@ def create_returns_tear_sheet(
     if benchmark_rets is not None:
         vertical_sections += 1
 
+    if risk_factors is not None:
+        vertical_sections += 1
+
     if bootstrap:
         vertical_sections += 1
 
@@ -559,6 +578,10 @@ def create_returns_tear_sheet(
     if benchmark_rets is not None:
         ax_rolling_beta = plt.subplot(gs[i, :], sharex=ax_rolling_returns)
         i += 1
+    if risk_factors is not None:
+        ax_rolling_factor_betas = plt.subplot(gs[i, :],
+                                              sharex=ax_rolling_returns)
+        i += 1
     ax_rolling_volatility = plt.subplot(gs[i, :], sharex=ax_rolling_returns)
     i += 1
     ax_rolling_sharpe = plt.subplot(gs[i, :], sharex=ax_rolling_returns)
@@ -617,6 +640,10 @@ def create_returns_tear_sheet(
         plotting.plot_rolling_beta(
             returns, benchmark_rets, ax=ax_rolling_beta)
 
+    if risk_factors is not None:
+        plotting.plot_rolling_beta(
+            returns, risk_factors, ax=ax_rolling_factor_betas)
+
     plotting.plot_rolling_volatility(
         returns, factor_returns=benchmark_rets, ax=ax_rolling_volatility)
 
@@ -901,7 +928,8 @@ def create_round_trip_tear_sheet(
     transactions: pd.DataFrame,
     sector_mappings: Union[dict[str, str], 'pd.Series[str]'] = None,
     estimate_intraday: Union[bool, str] = 'infer',
-    return_fig: bool = False
+    return_fig: bool = False,
+    n_jobs: int = 1
     ) -> Union[plt.Figure, None]:
     """
     Generate a number of figures and plots describing the duration,
@@ -937,6 +965,11 @@ def create_round_trip_tear_sheet(
 
     return_fig : boolean, optional
         If True, returns the figure that was plotted on.
+
+    n_jobs : int, optional
+        Number of worker processes used to extract round trips.
+
+        - See full explanation in round_trips.extract_round_trips.
     """
 
     positions = utils.check_intraday(estimate_intraday, returns,
@@ -947,7 +980,8 @@ def create_round_trip_tear_sheet(
     # extract_round_trips requires BoD portfolio_value
     trades = round_trips.extract_round_trips(
         transactions_closed,
-        portfolio_value=positions.sum(axis='columns') / (1 + returns)
+        portfolio_value=positions.sum(axis='columns') / (1 + returns),
+        n_jobs=n_jobs
     )
 
     if len(trades) < 5:
@@ -956,7 +990,8 @@ def create_round_trip_tear_sheet(
                Skipping round trip tearsheet.""", UserWarning)
         return
 
-    round_trips.print_round_trip_stats(trades)
+    round_trips.print_round_trip_stats(trades,
+                                       sector_mappings=sector_mappings)
 
     plotting.show_profit_attribution(trades)
 
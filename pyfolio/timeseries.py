@@ -15,7 +15,9 @@
 from __future__ import division
 
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
+import os
 
 import empyrical as ep
 import numpy as np
@@ -112,12 +114,14 @@ def rolling_beta(returns, factor_returns,
          - This is in the same style as returns.
     rolling_window : int, optional
         The size of the rolling window, in days, over which to compute
-        beta (default 6 months).
+        beta (default 6 months). Each window ends on, and includes,
+        the day labeled.
 
     Returns
     -------
-    pd.Series
-        Rolling beta.
+    pd.Series or pd.DataFrame
+        Rolling beta, with one column per factor if factor_returns is
+        a DataFrame.
 
     Note
     -----
@@ -125,19 +129,134 @@ def rolling_beta(returns, factor_returns,
     """
 
     if factor_returns.ndim > 1:
-        # Apply column-wise
-        return factor_returns.apply(partial(rolling_beta, returns),
-                                    rolling_window=rolling_window)
+        factors = factor_returns.reindex(returns.index)
     else:
-        out = pd.Series(index=returns.index)
-        for beg, end in zip(returns.index[0:-rolling_window],
-                            returns.index[rolling_window:]):
-            out.loc[end] = ep.beta(
-                returns.loc[beg:end],
-                factor_returns.loc[beg:end])
+        factors = factor_returns.reindex(returns.index).to_frame()
+
+    # Same as ep.beta on every window: population covariance over
+    # variance, using only the days on which both series are valid.
+    dependent = pd.DataFrame(
+        np.repeat(returns.values[:, np.newaxis], factors.shape[1], axis=1),
+        index=factors.index, columns=factors.columns)
+    valid = factors.notnull() & dependent.notnull()
+    factors = factors.where(valid)
+    dependent = dependent.where(valid)
+
+    window = factors.rolling(rolling_window, min_periods=1)
+    variances = window.var(ddof=0)
+    betas = window.cov(dependent, ddof=0) / variances.where(
+        variances >= 1.0e-30)
+    betas.iloc[:max(rolling_window, 2) - 1] = np.nan
+
+    if factor_returns.ndim > 1:
+        return betas
+    else:
+        return betas.iloc[:, 0].rename(None)
+
+
+def rolling_regression(returns, factor_returns,
+                       rolling_window=APPROX_BDAYS_PER_MONTH * 6):
+    """
+    Determines the rolling multi-factor regression of a strategy, i.e.
+    the alpha and betas of an OLS fit of returns on all factors jointly,
+    and its R-squared, over a rolling window.
+
+    Windowed sums of the cross-products X'X and X'y are updated by
+    adding one day and dropping one day per step, so the cost is
+    O(n * k^2) for n days and k factors.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series or pd.DataFrame
+        Daily noncumulative returns of the factors to regress on, one
+        column per factor (e.g. Fama-French factors).
+         - This is in the same style as returns.
+    rolling_window : int, optional
+        The size of the rolling window, in days, over which to fit the
+        regression (default 6 months). Each window ends on, and
+        includes, the day labeled.
 
+    Returns
+    -------
+    pd.DataFrame
+        Rolling daily alpha, one beta column per factor and r_squared.
+        Only days on which returns and all factors are valid are used,
+        and windows with (nearly) constant or collinear factors are NaN.
+    """
+
+    factors = factor_returns.reindex(returns.index)
+    if factors.ndim == 1:
+        factors = factors.to_frame()
+    k = factors.shape[1]
+
+    x = factors.to_numpy(dtype=float, copy=True)
+    y = returns.to_numpy(dtype=float, copy=True)
+    valid = ~np.isnan(y) & ~np.isnan(x).any(axis=1)
+    out = pd.DataFrame(np.nan, index=returns.index,
+                       columns=['alpha'] + list(factors.columns) +
+                       ['r_squared'])
+    if not valid.any():
         return out
 
+    # Center on the full-sample means so that the windowed sums stay
+    # well conditioned. Alpha is shifted back below.
+    x[~valid] = np.nan
+    y[~valid] = np.nan
+    x_mean = np.nanmean(x, axis=0)
+    y_mean = np.nanmean(y)
+    x -= x_mean
+    y -= y_mean
+
+    rows, cols = np.triu_indices(k)
+    products = np.column_stack([x, y, x * y[:, np.newaxis], y * y,
+                                x[:, rows] * x[:, cols]])
+    means = (pd.DataFrame(products)
+             .rolling(rolling_window, min_periods=1)
+             .mean()
+             .to_numpy())
+
+    mx = means[:, :k]
+    my = means[:, k]
+    mxy = means[:, k + 1:2 * k + 1]
+    myy = means[:, 2 * k + 1]
+    mxx = np.empty((len(means), k, k))
+    mxx[:, rows, cols] = means[:, 2 * k + 2:]
+    mxx[:, cols, rows] = means[:, 2 * k + 2:]
+
+    # Regression with an intercept on window-centered moments
+    cxx = mxx - mx[:, :, np.newaxis] * mx[:, np.newaxis, :]
+    cxy = mxy - mx * my[:, np.newaxis]
+    var_y = myy - my ** 2
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_x = np.diagonal(cxx, axis1=1, axis2=2)
+        scale = np.sqrt(np.where(var_x > 0, var_x, np.nan))
+        usable = (np.isfinite(scale).all(axis=1) &
+                  (var_x >= np.maximum(
+                      1.0e-30,
+                      1.0e-10 * np.diagonal(mxx, axis1=1, axis2=2))).all(
+                          axis=1))
+        usable[:max(rolling_window, k + 1) - 1] = False
+        corr = cxx / (scale[:, :, np.newaxis] * scale[:, np.newaxis, :])
+        corr[~usable] = np.eye(k)
+        usable &= np.linalg.eigvalsh(corr)[:, 0] > 1.0e-10
+
+        cxx[~usable] = np.eye(k)
+        betas = np.linalg.solve(cxx, cxy[:, :, np.newaxis])[:, :, 0]
+        alpha = my - (betas * mx).sum(axis=1) + y_mean - betas @ x_mean
+        r_squared = (betas * cxy).sum(axis=1) / np.where(
+            var_y > 0, var_y, np.nan)
+
+    out.iloc[usable, 0] = alpha[usable]
+    out.iloc[usable, 1:k + 1] = betas[usable]
+    out.iloc[usable, k + 1] = r_squared[usable]
+
+    return out
+
+
 def gross_lev(positions):
     """
     Calculates the gross leverage of a strategy.
@@ -224,6 +343,235 @@ STAT_FUNC_NAMES = {
 }
 
 
+# FACTOR_STAT_FUNCS (with default arguments) that evaluate many bootstrap
+# samples at once, given as 2-D arrays with one sample per column. The
+# SIMPLE_STAT_FUNCS are evaluated on all samples through a ReturnsProfile.
+VECTORIZED_FACTOR_STAT_FUNCS = [
+    ep.alpha,
+    ep.beta,
+]
+
+
+class ReturnsProfile(object):
+    """
+    Intermediate results shared by the metrics in SIMPLE_STAT_FUNCS.
+
+    The returns are copied once into a contiguous float64 array, from which
+    the mean, standard deviation, downside deviation, cumulative returns and
+    drawdown curve are computed a single time. Each metric is then derived
+    from these rather than recomputed from the raw returns, and matches the
+    empyrical function of the same name (with default arguments).
+
+    Parameters
+    ----------
+    returns : pd.Series, pd.DataFrame or np.ndarray
+        Daily returns of the strategy, noncumulative. 2-D input holds one
+        strategy per column, and each metric then returns an array with
+        one value per column.
+         - See full explanation in tears.create_full_tear_sheet.
+    trim_missing : bool, optional
+        If True, the NaNs before the first and after the last valid return
+        of each column are not counted as days, so that columns starting
+        or ending on different dates give the same metrics as their valid
+        span alone. Otherwise, as in empyrical, every row is counted.
+    """
+
+    def __init__(self, returns, trim_missing=False):
+        self.returns = returns
+        values = np.asarray(returns, dtype=np.float64)
+        self.ndim = values.ndim
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        self.values = np.ascontiguousarray(values)
+
+        missing = np.isnan(values)
+        n_valid = (~missing).sum(axis=0)
+        if trim_missing:
+            # Days before the first and after the last valid return of
+            # each column are padding, not observations
+            first = np.argmax(~missing, axis=0)
+            last = len(values) - np.argmax(~missing[::-1], axis=0)
+            self.n_obs = np.where(n_valid > 0, last - first, 0)
+        else:
+            self.n_obs = np.full(values.shape[1], len(values))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean = np.where(n_valid > 0, np.where(
+                missing, 0., values).sum(axis=0) / n_valid, np.nan)
+            demeaned = np.where(missing, 0., values - self.mean)
+            self.std = np.sqrt((demeaned ** 2).sum(axis=0) / (n_valid - 1))
+            self.std[n_valid < 2] = np.nan
+            self.downside_risk = np.sqrt(
+                (np.minimum(np.where(missing, 0., values), 0.) ** 2)
+                .sum(axis=0) / n_valid) * np.sqrt(APPROX_BDAYS_PER_YEAR)
+
+            # Cumulative wealth from a starting value of 1, and its
+            # drawdown from the running peak (including the start)
+            self.cum_returns = np.cumprod(
+                1. + np.where(missing, 0., values), axis=0)
+            peak = np.maximum.accumulate(self.cum_returns, axis=0)
+            np.maximum(peak, 1., out=peak)
+            self.drawdown = self.cum_returns / peak - 1.
+        self._missing = missing
+        self._n_valid = n_valid
+        self._moments = None
+
+    def _nan(self):
+        return np.full(self.values.shape[1], np.nan)
+
+    def _result(self, values, min_obs=0):
+        values = np.where(self.n_obs >= min_obs, values, np.nan)
+        if self.ndim == 1:
+            return values[0]
+        return values
+
+    def _ending_value(self):
+        if not len(self.values):
+            return self._nan()
+        return self.cum_returns[-1]
+
+    def _max_drawdown(self):
+        if not len(self.values):
+            return self._nan()
+        return np.nanmin(self.drawdown, axis=0)
+
+    def annual_return(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._result(self._ending_value() ** (
+                APPROX_BDAYS_PER_YEAR / self.n_obs) - 1, min_obs=1)
+
+    def cum_returns_final(self):
+        return self._result(self._ending_value() - 1, min_obs=1)
+
+    def annual_volatility(self):
+        return self._result(
+            self.std * np.sqrt(APPROX_BDAYS_PER_YEAR), min_obs=2)
+
+    def sharpe_ratio(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sharpe = self.mean / self.std * np.sqrt(APPROX_BDAYS_PER_YEAR)
+        return self._result(sharpe, min_obs=2)
+
+    def max_drawdown(self):
+        return self._result(self._max_drawdown(), min_obs=1)
+
+    def calmar_ratio(self):
+        max_dd = self._max_drawdown()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            calmar = (self._ending_value() ** (
+                APPROX_BDAYS_PER_YEAR / self.n_obs) - 1) / np.abs(max_dd)
+        return self._result(
+            np.where((max_dd < 0) & np.isfinite(calmar), calmar, np.nan),
+            min_obs=1)
+
+    def stability_of_timeseries(self):
+        # Missing days are dropped, so the time index counts valid days
+        valid = ~self._missing
+        n_valid = self._n_valid
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.cumsum(valid, axis=0) - 1.
+            cum_log_returns = np.cumsum(
+                np.log1p(np.where(valid, self.values, 0.)), axis=0)
+            t -= (n_valid - 1) / 2.
+            cum_log_returns -= np.where(
+                valid, cum_log_returns, 0.).sum(axis=0) / n_valid
+            t[~valid] = 0.
+            cum_log_returns[~valid] = 0.
+            ssx = (t ** 2).sum(axis=0)
+            ssy = (cum_log_returns ** 2).sum(axis=0)
+            rhat = np.where((ssx > 0) & (ssy > 0), (t * cum_log_returns).sum(
+                axis=0) / np.sqrt(ssx * ssy), np.nan)
+        rhat = np.clip(rhat, -1., 1.)
+        return self._result(np.where(n_valid >= 2, rhat ** 2, np.nan),
+                            min_obs=2)
+
+    def omega_ratio(self):
+        values = np.where(self._missing, 0., self.values)
+        numer = np.where(values > 0, values, 0.).sum(axis=0)
+        denom = -np.where(values < 0, values, 0.).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            omega = np.where(denom > 0, numer / denom, np.nan)
+        return self._result(omega, min_obs=2)
+
+    def sortino_ratio(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sortino = (self.mean * APPROX_BDAYS_PER_YEAR /
+                       self.downside_risk)
+        return self._result(sortino, min_obs=2)
+
+    def _central_moments(self):
+        if self._moments is None:
+            demeaned = np.where(self._missing, 0., self.values - self.mean)
+            squared = demeaned * demeaned
+            with np.errstate(invalid='ignore', divide='ignore'):
+                m2 = squared.sum(axis=0) / self._n_valid
+                m3 = (squared * demeaned).sum(axis=0) / self._n_valid
+                m4 = (squared * squared).sum(axis=0) / self._n_valid
+            # Like scipy.stats, missing values and constant series give nan
+            m2[(self._n_valid < self.n_obs) |
+               (m2 <= (np.finfo(np.float64).eps * self.mean) ** 2)] = np.nan
+            self._moments = m2, m3, m4
+        return self._moments
+
+    def skew(self):
+        m2, m3, _ = self._central_moments()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._result(m3 / m2 ** 1.5)
+
+    def kurtosis(self):
+        m2, _, m4 = self._central_moments()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._result(m4 / m2 ** 2 - 3.)
+
+    def tail_ratio(self):
+        # Linear interpolation between order statistics, as np.percentile,
+        # with missing values sorted to the end of each column
+        ordered = np.sort(self.values, axis=0)
+        n_valid = self._n_valid
+        columns = np.arange(ordered.shape[1])
+        percentiles = []
+        for q in (0.95, 0.05):
+            position = q * np.maximum(n_valid - 1, 0)
+            lower = np.floor(position).astype(np.intp)
+            upper = np.minimum(lower + 1, np.maximum(n_valid - 1, 0))
+            if not len(ordered):
+                percentiles.append(self._nan())
+                continue
+            a = ordered[lower, columns]
+            b = ordered[upper, columns]
+            percentiles.append(a + (b - a) * (position - lower))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tail = np.abs(percentiles[0]) / np.abs(percentiles[1])
+        return self._result(np.where(n_valid > 0, tail, np.nan))
+
+    def value_at_risk(self):
+        return self._result(self.mean - 2.0 * self.std)
+
+    def stat(self, stat_func):
+        """
+        Evaluate one of SIMPLE_STAT_FUNCS from the profile.
+
+        Functions the profile does not know are called on the returns, or
+        on the valid returns of each column for 2-D input.
+        """
+        method = PROFILE_STAT_METHODS.get(stat_func)
+        if method is not None:
+            return getattr(self, method)()
+        if self.ndim == 1:
+            return stat_func(self.returns)
+        return np.array([stat_func(pd.Series(column).dropna())
+                         for column in self.values.T])
+
+
+PROFILE_STAT_METHODS = {
+    stat_func: stat_func.__name__ for stat_func in SIMPLE_STAT_FUNCS
+}
+
+# Number of strategies (columns) whose intermediates are held in memory at
+# once when computing perf_stats for a returns DataFrame.
+PERF_STATS_CHUNK_SIZE = 500
+
+
 def perf_stats(returns, factor_returns=None, positions=None,
                transactions=None, turnover_denom='AGB'):
     """
@@ -232,9 +580,13 @@ def perf_stats(returns, factor_returns=None, positions=None,
 
     Parameters
     ----------
-    returns : pd.Series
-        Daily returns of the strategy, noncumulative.
+    returns : pd.Series, pd.DataFrame or ReturnsProfile
+        Daily returns of the strategy, noncumulative, or a ReturnsProfile
+        of them that has already been computed.
          - See full explanation in tears.create_full_tear_sheet.
+         - If DataFrame is passed, computes the metrics of each column
+           (e.g. of each strategy in a parameter scan). Columns may be
+           NaN before their first and after their last return.
     factor_returns : pd.Series, optional
         Daily noncumulative returns of the benchmark factor to which betas are
         computed. Usually a benchmark such as market returns.
@@ -252,18 +604,33 @@ def perf_stats(returns, factor_returns=None, positions=None,
 
     Returns
     -------
-    pd.Series
-        Performance metrics.
+    pd.Series or pd.DataFrame
+        Performance metrics, with one row per strategy if returns is a
+        DataFrame.
     """
+    if isinstance(returns, pd.DataFrame):
+        if positions is not None or transactions is not None:
+            raise ValueError(
+                "Positions and transactions are not supported when returns "
+                "is a DataFrame.")
+        return _perf_stats_frame(returns, factor_returns)
+
     def nan_round(x):
         if np.isnan(x):
             return np.nan
         else:
             return round(x, 4)
 
-    stats = pd.Series()
+    if isinstance(returns, ReturnsProfile):
+        profile = returns
+        returns = profile.returns
+    else:
+        profile = ReturnsProfile(returns)
+
+    stats = OrderedDict()
     for stat_func in SIMPLE_STAT_FUNCS:
-        stats[STAT_FUNC_NAMES[stat_func.__name__]] = nan_round(stat_func(returns))
+        stats[STAT_FUNC_NAMES[stat_func.__name__]] = nan_round(
+            profile.stat(stat_func))
 
     if positions is not None:
         stats['Gross leverage'] = nan_round(gross_lev(positions).mean())
@@ -276,11 +643,43 @@ def perf_stats(returns, factor_returns=None, positions=None,
             res = stat_func(returns, factor_returns)
             stats[STAT_FUNC_NAMES[stat_func.__name__]] = nan_round(res)
 
+    stats = pd.Series(stats, dtype=np.float64)
+
     return stats
 
 
+def _perf_stats_frame(returns, factor_returns=None):
+    """
+    perf_stats for each column of returns, PERF_STATS_CHUNK_SIZE columns
+    at a time.
+    """
+    names = [STAT_FUNC_NAMES[stat_func.__name__]
+             for stat_func in SIMPLE_STAT_FUNCS]
+    if factor_returns is not None:
+        names += [STAT_FUNC_NAMES[stat_func.__name__]
+                  for stat_func in FACTOR_STAT_FUNCS]
+        # Missing factor returns are skipped, as with inner-joined series
+        factor_values = np.asarray(
+            factor_returns.reindex(returns.index),
+            dtype=np.float64)[:, np.newaxis]
+
+    stats = pd.DataFrame(np.nan, index=returns.columns, columns=names)
+    for start in range(0, returns.shape[1], PERF_STATS_CHUNK_SIZE):
+        block = returns.iloc[:, start:start + PERF_STATS_CHUNK_SIZE]
+        profile = ReturnsProfile(block, trim_missing=True)
+        results = [profile.stat(stat_func)
+                   for stat_func in SIMPLE_STAT_FUNCS]
+        if factor_returns is not None:
+            results += [stat_func(profile.values, factor_values)
+                        for stat_func in FACTOR_STAT_FUNCS]
+        stats.iloc[start:start + block.shape[1]] = np.column_stack(results)
+
+    return stats.round(4)
+
+
 def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
-                         **kwargs):
+                         random_state=None, n_jobs=1, sampling='iid',
+                         block_size=None, **kwargs):
     """Calculates various bootstrapped performance metrics of a strategy.
 
     Parameters
@@ -298,6 +697,20 @@ def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
         for each perf metric.
         If False, returns a DataFrame with the bootstrap samples for
         each perf metric.
+    random_state : int or np.random.SeedSequence, optional
+        Seed of the bootstrap samples.
+         - See full explanation in timeseries.calc_bootstrap.
+    n_jobs : int, optional
+        Number of worker processes.
+         - See full explanation in timeseries.calc_bootstrap.
+    sampling : str, optional
+        How days are resampled: 'iid', 'block' or 'stationary'.
+         - See full explanation in timeseries.calc_bootstrap.
+    block_size : int or float, optional
+        (Mean) block length for block sampling.
+         - See full explanation in timeseries.calc_bootstrap.
+    n_samples : int, optional
+        Number of bootstrap samples to draw. Default is 1000.
 
     Returns
     -------
@@ -309,22 +722,21 @@ def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
         - Bootstrap samples for each performance metric.
     """
 
-    bootstrap_values = OrderedDict()
-
-    for stat_func in SIMPLE_STAT_FUNCS:
-        stat_name = STAT_FUNC_NAMES[stat_func.__name__]
-        bootstrap_values[stat_name] = calc_bootstrap(stat_func,
-                                                     returns)
-
+    # All metrics are computed on the same bootstrap samples
+    stat_funcs = [(stat_func, False) for stat_func in SIMPLE_STAT_FUNCS]
     if factor_returns is not None:
-        for stat_func in FACTOR_STAT_FUNCS:
-            stat_name = STAT_FUNC_NAMES[stat_func.__name__]
-            bootstrap_values[stat_name] = calc_bootstrap(
-                stat_func,
-                returns,
-                factor_returns=factor_returns)
+        stat_funcs += [(stat_func, True) for stat_func in FACTOR_STAT_FUNCS]
 
-    bootstrap_values = pd.DataFrame(bootstrap_values)
+    values = _bootstrap(stat_funcs, returns, factor_returns,
+                        n_samples=kwargs.pop('n_samples', 1000),
+                        random_state=random_state,
+                        n_jobs=n_jobs,
+                        sampling=sampling,
+                        block_size=block_size)
+
+    bootstrap_values = pd.DataFrame(OrderedDict(
+        (STAT_FUNC_NAMES[stat_func.__name__], stat_values)
+        for (stat_func, _), stat_values in zip(stat_funcs, values)))
 
     if return_stats:
         stats = bootstrap_values.apply(calc_distribution_stats)
@@ -354,23 +766,206 @@ def calc_bootstrap(func, returns, *args, **kwargs):
     n_samples : int, optional
         Number of bootstrap samples to draw. Default is 1000.
         Increasing this will lead to more stable / accurate estimates.
+    random_state : int or np.random.SeedSequence, optional
+        Seed of the bootstrap samples. Samples are drawn in fixed-size
+        chunks, each from its own child stream of the seed, so results
+        are identical for a given seed whatever n_jobs is. If None, the
+        seed is drawn from the global numpy random state.
+    n_jobs : int, optional
+        Number of worker processes the chunks are distributed over. If
+        None or negative, use all available CPUs. Default is 1 (no
+        parallelism). With n_jobs > 1, func must be picklable.
+    sampling : str, optional
+        How days are resampled, to preserve autocorrelation such as
+        volatility clustering or not:
+        - 'iid': independent days (default).
+        - 'block': moving-block bootstrap, concatenating blocks of
+          block_size consecutive days.
+        - 'stationary': stationary bootstrap (Politis and Romano),
+          concatenating blocks of random, geometrically distributed
+          lengths with mean block_size, wrapping around the end.
+    block_size : int or float, optional
+        (Mean) block length for 'block' and 'stationary' sampling.
+        Default is the cube root of the number of days.
 
     Returns
     -------
     numpy.ndarray
         Bootstrapped sampling distribution of passed in func.
+
+    Note
+    -----
+    SIMPLE_STAT_FUNCS and FACTOR_STAT_FUNCS called without extra
+    arguments are evaluated on all samples of a chunk at once (the former
+    through a shared ReturnsProfile); any other func is called once per
+    sample.
     """
 
     n_samples = kwargs.pop('n_samples', 1000)
-    out = np.empty(n_samples)
-
     factor_returns = kwargs.pop('factor_returns', None)
+    random_state = kwargs.pop('random_state', None)
+    n_jobs = kwargs.pop('n_jobs', 1)
+    sampling = kwargs.pop('sampling', 'iid')
+    block_size = kwargs.pop('block_size', None)
 
-    for i in range(n_samples):
-        idx = np.random.randint(len(returns), size=len(returns))
-        returns_i = returns.iloc[idx].reset_index(drop=True)
-        if factor_returns is not None:
-            factor_returns_i = factor_returns.iloc[idx].reset_index(drop=True)
+    values, = _bootstrap([(func, factor_returns is not None)],
+                         returns, factor_returns,
+                         n_samples=n_samples,
+                         random_state=random_state,
+                         n_jobs=n_jobs,
+                         sampling=sampling,
+                         block_size=block_size,
+                         args=args,
+                         kwargs=kwargs)
+
+    return values
+
+
+# Number of bootstrap samples drawn from each random stream. Fixed so
+# that samples do not depend on how chunks are distributed over workers.
+BOOTSTRAP_CHUNK_SIZE = 250
+
+
+BOOTSTRAP_SAMPLING = {'iid', 'block', 'stationary'}
+
+
+def _bootstrap_indices(rng, n_obs, n_paths, length, sampling='iid',
+                       block_size=None):
+    """Draw the indices of n_paths bootstrap paths of length days from
+    n_obs days, as an array of shape (n_paths, length). See
+    calc_bootstrap for sampling and block_size.
+    """
+
+    if sampling == 'iid':
+        return rng.integers(n_obs, size=(n_paths, length))
+
+    if block_size is None:
+        block_size = n_obs ** (1 / 3.)
+
+    if sampling == 'block':
+        block_size = int(min(max(round(block_size), 1), n_obs))
+        n_blocks = -(-length // block_size)
+        starts = rng.integers(n_obs - block_size + 1,
+                              size=(n_paths, n_blocks, 1))
+        idx = (starts + np.arange(block_size)).reshape(n_paths, -1)
+        return idx[:, :length]
+
+    # Stationary bootstrap: each day starts a new block with probability
+    # 1 / block_size, and otherwise continues the current one. The flag
+    # and the start of each day come from one draw per path, so that
+    # paths do not depend on how many are drawn at once.
+    uniform = rng.random((n_paths, length, 2))
+    new_block = uniform[..., 0] < 1. / max(block_size, 1)
+    new_block[:, 0] = True
+    starts = np.minimum((uniform[..., 1] * n_obs).astype(np.intp),
+                        n_obs - 1)
+    days = np.arange(length)
+    block_start = np.maximum.accumulate(
+        np.where(new_block, days, 0), axis=1)
+    return (np.take_along_axis(starts, block_start, axis=1) +
+            days - block_start) % n_obs
+
+
+def _bootstrap(stat_funcs, returns, factor_returns=None, n_samples=1000,
+               random_state=None, n_jobs=1, sampling='iid', block_size=None,
+               args=(), kwargs=None):
+    """Evaluate stat_funcs, a list of (func, takes_factor_returns)
+    pairs, on bootstrap samples of returns. Returns an array with one
+    row per function and one column per sample.
+    """
+
+    if sampling not in BOOTSTRAP_SAMPLING:
+        raise ValueError(
+            "Unexpected value for sampling '{}'. The sampling parameter "
+            "must be one of {}.".format(sampling, sorted(BOOTSTRAP_SAMPLING)))
+
+    if random_state is None:
+        random_state = np.random.randint(2 ** 32, dtype=np.int64)
+    if not isinstance(random_state, np.random.SeedSequence):
+        random_state = np.random.SeedSequence(random_state)
+
+    chunk_sizes = [min(BOOTSTRAP_CHUNK_SIZE, n_samples - start)
+                   for start in range(0, n_samples, BOOTSTRAP_CHUNK_SIZE)]
+    seeds = random_state.spawn(len(chunk_sizes))
+
+    returns = np.asarray(returns, dtype=float)
+    if factor_returns is not None:
+        factor_returns = np.asarray(factor_returns, dtype=float)
+
+    bootstrap_chunk = partial(_bootstrap_chunk, stat_funcs=stat_funcs,
+                              returns=returns,
+                              factor_returns=factor_returns,
+                              sampling=sampling, block_size=block_size,
+                              args=args, kwargs=kwargs or {})
+
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(chunk_sizes))
+
+    if n_jobs <= 1:
+        values = list(map(bootstrap_chunk, seeds, chunk_sizes))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            values = list(executor.map(bootstrap_chunk, seeds, chunk_sizes))
+
+    if not values:
+        return np.empty((len(stat_funcs), 0))
+
+    return np.concatenate(values, axis=1)
+
+
+def _bootstrap_chunk(seed, n_samples, stat_funcs, returns, factor_returns,
+                     sampling, block_size, args, kwargs):
+    """Draw n_samples bootstrap samples from seed and evaluate
+    stat_funcs on them.
+
+    Defined at module level so that it can be sent to worker processes.
+    """
+
+    rng = np.random.default_rng(seed)
+    idx = _bootstrap_indices(rng, len(returns), n_samples, len(returns),
+                             sampling=sampling, block_size=block_size).T
+    samples = returns[idx]
+    factor_samples = None if factor_returns is None else factor_returns[idx]
+
+    # Intermediates shared by all the simple stats of the samples
+    profile = None
+    if not args and not kwargs and any(
+            func in PROFILE_STAT_METHODS for func, _ in stat_funcs):
+        profile = ReturnsProfile(samples)
+
+    return np.array([
+        _calc_bootstrap_samples(
+            func, samples, factor_samples if takes_factor_returns else None,
+            *args, profile=profile, **kwargs)
+        for func, takes_factor_returns in stat_funcs]).reshape(
+            len(stat_funcs), n_samples)
+
+
+def _calc_bootstrap_samples(func, samples, factor_samples=None,
+                            *args, profile=None, **kwargs):
+    """Evaluate func on each column of samples (and factor_samples).
+
+    profile is a ReturnsProfile of samples to reuse, if already computed.
+    """
+
+    if not args and not kwargs:
+        if func in PROFILE_STAT_METHODS and factor_samples is None:
+            if profile is None:
+                profile = ReturnsProfile(samples)
+            return np.asarray(profile.stat(func), dtype=float)
+        if (func in VECTORIZED_FACTOR_STAT_FUNCS and
+                factor_samples is not None and
+                not np.isnan(samples).any() and
+                not np.isnan(factor_samples).any()):
+            out = func(samples, factor_samples)
+            return np.asarray(out, dtype=float).reshape(samples.shape[1])
+
+    out = np.empty(samples.shape[1])
+    for i in range(samples.shape[1]):
+        returns_i = pd.Series(samples[:, i])
+        if factor_samples is not None:
+            factor_returns_i = pd.Series(factor_samples[:, i])
             out[i] = func(returns_i, factor_returns_i,
                           *args, **kwargs)
         else:
@@ -468,6 +1063,61 @@ def get_max_drawdown(returns):
     return get_max_drawdown_underwater(underwater)
 
 
+def _get_drawdown_episodes(returns):
+    """
+    Splits the underwater curve of returns into drawdown episodes, i.e.
+    maximal periods below the running maximum, in a single pass.
+
+    Returns
+    -------
+    underwater : pd.Series
+        Underwater returns (rolling drawdown) of the strategy.
+    episodes : dict of np.ndarray
+        Positions of the peak, valley and recovery (-1 if not recovered)
+        and depth of each episode, deepest first. Episodes of equal
+        depth are in chronological order.
+    """
+
+    df_cum = ep.cum_returns(returns, 1.0)
+    running_max = np.maximum.accumulate(df_cum)
+    underwater = df_cum / running_max - 1
+
+    values = np.asarray(underwater, dtype=float)
+    below = values < 0
+    edges = np.diff(np.concatenate([[False], below, [False]]).astype(int))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)  # first position after the episode
+
+    if len(starts) == 0:
+        # Like get_max_drawdown_underwater, a curve that never draws
+        # down has a drawdown of 0 at its start.
+        episodes = {
+            'peak': np.zeros(min(len(values), 1), dtype=int),
+            'valley': np.zeros(min(len(values), 1), dtype=int),
+            'recovery': np.zeros(min(len(values), 1), dtype=int),
+            'depth': np.zeros(min(len(values), 1)),
+        }
+        return underwater, episodes
+
+    # Depth and first position of the minimum of each episode
+    depths = np.minimum.reduceat(np.append(values, 0),
+                                 np.column_stack([starts, ends]).ravel())[::2]
+    episode = np.cumsum(edges[:-1] == 1) - 1
+    at_min = below & (values == depths[episode.clip(0)])
+    _, first_min = np.unique(episode[at_min], return_index=True)
+    valleys = np.flatnonzero(at_min)[first_min]
+
+    order = np.argsort(depths, kind='mergesort')
+    episodes = {
+        'peak': (starts - 1).clip(0)[order],
+        'valley': valleys[order],
+        'recovery': np.where(ends < len(values), ends, -1)[order],
+        'depth': depths[order],
+    }
+
+    return underwater, episodes
+
+
 def get_top_drawdowns(returns, top=10):
     """
     Finds top drawdowns, sorted by drawdown amount.
@@ -478,7 +1128,8 @@ def get_top_drawdowns(returns, top=10):
         Daily returns of the strategy, noncumulative.
          - See full explanation in tears.create_full_tear_sheet.
     top : int, optional
-        The amount of top drawdowns to find (default 10).
+        The amount of top drawdowns to find (default 10). If None, find
+        all drawdowns.
 
     Returns
     -------
@@ -486,25 +1137,15 @@ def get_top_drawdowns(returns, top=10):
         List of drawdown peaks, valleys, and recoveries. See get_max_drawdown.
     """
 
-    returns = returns.copy()
-    df_cum = ep.cum_returns(returns, 1.0)
-    running_max = np.maximum.accumulate(df_cum)
-    underwater = df_cum / running_max - 1
+    underwater, episodes = _get_drawdown_episodes(returns)
+    index = underwater.index
 
     drawdowns = []
-    for _ in range(top):
-        peak, valley, recovery = get_max_drawdown_underwater(underwater)
-        # Slice out draw-down period
-        if not pd.isnull(recovery):
-            underwater.drop(underwater[peak: recovery].index[1:-1],
-                            inplace=True)
-        else:
-            # drawdown has not ended yet
-            underwater = underwater.loc[:peak]
-
-        drawdowns.append((peak, valley, recovery))
-        if (len(returns) == 0) or (len(underwater) == 0) or (np.min(underwater) == 0):
-            break
+    for peak, valley, recovery in zip(episodes['peak'][:top],
+                                      episodes['valley'][:top],
+                                      episodes['recovery'][:top]):
+        drawdowns.append((index[peak], index[valley],
+                          index[recovery] if recovery >= 0 else np.nan))
 
     return drawdowns
 
@@ -519,7 +1160,8 @@ def gen_drawdown_table(returns, top=10):
         Daily returns of the strategy, noncumulative.
          - See full explanation in tears.create_full_tear_sheet.
     top : int, optional
-        The amount of top drawdowns to find (default 10).
+        The amount of top drawdowns to find (default 10). If None, find
+        all drawdowns.
 
     Returns
     -------
@@ -527,44 +1169,39 @@ def gen_drawdown_table(returns, top=10):
         Information about top drawdowns.
     """
 
-    df_cum = ep.cum_returns(returns, 1.0)
-    drawdown_periods = get_top_drawdowns(returns, top=top)
-    df_drawdowns = pd.DataFrame(index=list(range(top)),
-                                columns=['Net drawdown in %',
-                                         'Peak date',
-                                         'Valley date',
-                                         'Recovery date',
-                                         'Duration'])
-
-    # if there were fewer than the requested number of drawdowns
-    # (which can happen if an early drawdown never recovers),
-    # only return the available number of drawdowns (otherwise
-    # the worst drawdowns plot can mess up the shared X axis)
-    df_drawdowns = df_drawdowns.dropna(how="all")
-
-    for i, (peak, valley, recovery) in enumerate(drawdown_periods):
-        if pd.isnull(recovery):
-            df_drawdowns.loc[i, 'Duration'] = np.nan
-        else:
-            df_drawdowns.loc[i, 'Duration'] = len(pd.date_range(peak,
-                                                                recovery,
-                                                                freq='B'))
-        df_drawdowns.loc[i, 'Peak date'] = (peak.to_pydatetime()
-                                            .strftime('%Y-%m-%d'))
-        df_drawdowns.loc[i, 'Valley date'] = (valley.to_pydatetime()
-                                              .strftime('%Y-%m-%d'))
-        if isinstance(recovery, float):
-            df_drawdowns.loc[i, 'Recovery date'] = recovery
-        else:
-            df_drawdowns.loc[i, 'Recovery date'] = (recovery.to_pydatetime()
-                                                    .strftime('%Y-%m-%d'))
-        df_drawdowns.loc[i, 'Net drawdown in %'] = (
-            (df_cum.loc[peak] - df_cum.loc[valley]) / df_cum.loc[peak]) * 100
-
-    df_drawdowns['Peak date'] = pd.to_datetime(df_drawdowns['Peak date'])
-    df_drawdowns['Valley date'] = pd.to_datetime(df_drawdowns['Valley date'])
-    df_drawdowns['Recovery date'] = pd.to_datetime(
-        df_drawdowns['Recovery date'])
+    underwater, episodes = _get_drawdown_episodes(returns)
+    peak = episodes['peak'][:top]
+    valley = episodes['valley'][:top]
+    recovery = episodes['recovery'][:top]
+    recovered = recovery >= 0
+
+    df_cum = np.asarray(ep.cum_returns(returns, 1.0), dtype=float)
+    net_drawdown = (df_cum[peak] - df_cum[valley]) / df_cum[peak] * 100
+
+    # Dates, without time of day, in the time zone of returns
+    dates = underwater.index
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    dates = dates.normalize()
+    peak_date = dates[peak]
+    valley_date = dates[valley]
+    recovery_date = pd.DatetimeIndex(
+        np.where(recovered, dates[recovery].values, np.datetime64('NaT')))
+
+    # Business days from peak to recovery, both included
+    duration = np.busday_count(
+        peak_date.values.astype('M8[D]'),
+        dates[np.where(recovered, recovery, peak)].values.astype('M8[D]') +
+        np.timedelta64(1, 'D')).astype(object)
+    duration[~recovered] = np.nan
+
+    df_drawdowns = pd.DataFrame(OrderedDict([
+        ('Net drawdown in %', net_drawdown),
+        ('Peak date', peak_date),
+        ('Valley date', valley_date),
+        ('Recovery date', recovery_date),
+        ('Duration', duration),
+    ]))
 
     return df_drawdowns
 
@@ -619,7 +1256,8 @@ def rolling_sharpe(returns, rolling_sharpe_window):
 
 
 def simulate_paths(is_returns, num_days,
-                   starting_value=1, num_samples=1000, random_seed=None):
+                   starting_value=1, num_samples=1000, random_seed=None,
+                   chunksize=None, sampling='iid', block_size=None):
     """
     Gnerate alternate paths using available values from in-sample returns.
 
@@ -637,47 +1275,120 @@ def simulate_paths(is_returns, num_days,
         A higher number of samples will generate a more accurate
         bootstrap cone.
     random_seed : int
-        Seed for the pseudorandom number generator used by the pandas
-        sample method.
+        Seed for the numpy random Generator used to draw the samples.
+    chunksize : int, optional
+        If passed, return an iterator over arrays of at most chunksize
+        samples instead of a single array, so that the samples never
+        need to be held in memory at once. The samples are the same as
+        without chunksize.
+    sampling : str, optional
+        How days are resampled: 'iid', 'block' or 'stationary'. Block
+        sampling preserves volatility clustering within blocks.
+         - See full explanation in timeseries.calc_bootstrap.
+    block_size : int or float, optional
+        (Mean) block length for block sampling.
+         - See full explanation in timeseries.calc_bootstrap.
 
     Returns
     -------
-    samples : numpy.ndarray
+    samples : numpy.ndarray or iterator of numpy.ndarray
+        Samples of shape (num_samples, num_days).
     """
 
-    samples = np.empty((num_samples, num_days))
-    seed = np.random.RandomState(seed=random_seed)
-    for i in range(num_samples):
-        samples[i, :] = is_returns.sample(num_days, replace=True,
-                                          random_state=seed)
+    if sampling not in BOOTSTRAP_SAMPLING:
+        raise ValueError(
+            "Unexpected value for sampling '{}'. The sampling parameter "
+            "must be one of {}.".format(sampling, sorted(BOOTSTRAP_SAMPLING)))
+
+    rng = np.random.default_rng(random_seed)
+    is_returns = np.asarray(is_returns, dtype=float)
+
+    def draw(n):
+        return is_returns[_bootstrap_indices(rng, len(is_returns), n,
+                                             num_days, sampling=sampling,
+                                             block_size=block_size)]
 
-    return samples
+    if chunksize is None:
+        return draw(num_samples)
 
+    return (draw(min(chunksize, num_samples - start))
+            for start in range(0, num_samples, chunksize))
 
-def summarize_paths(samples, cone_std=(1., 1.5, 2.), starting_value=1.):
+
+def summarize_paths(samples, cone_std=(1., 1.5, 2.), starting_value=1.,
+                    quantiles=None, quantile_samples=10000):
     """
     Gnerate the upper and lower bounds of an n standard deviation
     cone of forecasted cumulative returns.
 
+    The mean and standard deviation of the cumulative returns on each
+    day are accumulated chunk by chunk (Welford/Chan), so samples can
+    be an iterator of chunks that never fits in memory at once.
+
     Parameters
     ----------
-    samples : numpy.ndarray
-        Alternative paths, or series of possible outcomes.
+    samples : numpy.ndarray or iterable of numpy.ndarray
+        Alternative paths, or series of possible outcomes, of shape
+        (num_samples, num_days), or chunks of such paths (see the
+        chunksize parameter of simulate_paths).
     cone_std : list of int/float
         Number of standard devations to use in the boundaries of
         the cone. If multiple values are passed, cone bounds will
         be generated for each value.
+    starting_value : int or float
+        Starting value of the out of sample period.
+    quantiles : list of float, optional
+        If passed, also return quantile bands of the cumulative
+        returns, e.g. [.05, .95], in columns named after the
+        percentile ('5%', '95%').
+    quantile_samples : int, optional
+        Number of paths, taken from the start of samples, from which
+        quantile bands are estimated. Bounds the memory used for them.
 
     Returns
     -------
     samples : pandas.core.frame.DataFrame
     """
 
-    cum_samples = ep.cum_returns(samples.T,
-                                 starting_value=starting_value).T
+    if isinstance(samples, np.ndarray):
+        samples = [samples]
 
-    cum_mean = cum_samples.mean(axis=0)
-    cum_std = cum_samples.std(axis=0)
+    count = 0
+    cum_mean = cum_m2 = None
+    quantile_paths = []
+    num_quantile_paths = 0
+    for chunk in samples:
+        if len(chunk) == 0:
+            continue
+        cum_chunk = ep.cum_returns(chunk.T, starting_value=starting_value).T
+
+        # Merge the moments of the chunk into the running moments
+        chunk_mean = cum_chunk.mean(axis=0)
+        chunk_m2 = ((cum_chunk - chunk_mean) ** 2).sum(axis=0)
+        if cum_mean is None:
+            cum_mean, cum_m2 = chunk_mean, chunk_m2
+        else:
+            delta = chunk_mean - cum_mean
+            total = count + len(cum_chunk)
+            cum_mean = cum_mean + delta * len(cum_chunk) / total
+            cum_m2 = (cum_m2 + chunk_m2 +
+                      delta ** 2 * count * len(cum_chunk) / total)
+        count += len(cum_chunk)
+
+        if quantiles is not None and num_quantile_paths < quantile_samples:
+            quantile_paths.append(
+                cum_chunk[:quantile_samples - num_quantile_paths])
+            num_quantile_paths += len(quantile_paths[-1])
+
+    if count == 0:
+        raise ValueError("No sample paths to summarize.")
+    if quantiles is not None and num_quantile_paths == 0:
+        raise ValueError(
+            "Unexpected value for quantile_samples '{}'. At least one "
+            "sample path is needed to estimate quantiles.".format(
+                quantile_samples))
+
+    cum_std = np.sqrt(cum_m2 / count)
 
     if isinstance(cone_std, (float, int)):
         cone_std = [cone_std]
@@ -687,12 +1398,19 @@ def summarize_paths(samples, cone_std=(1., 1.5, 2.), starting_value=1.):
         cone_bounds.loc[:, float(num_std)] = cum_mean + cum_std * num_std
         cone_bounds.loc[:, float(-num_std)] = cum_mean - cum_std * num_std
 
+    if quantiles is not None:
+        quantile_paths = np.concatenate(quantile_paths)
+        for q in quantiles:
+            cone_bounds['{:g}%'.format(q * 100)] = np.quantile(
+                quantile_paths, q, axis=0)
+
     return cone_bounds
 
 
 def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
                             starting_value=1, num_samples=1000,
-                            random_seed=None):
+                            random_seed=None, chunksize=10000,
+                            sampling='iid', block_size=None):
     """
     Determines the upper and lower bounds of an n standard deviation
     cone of forecasted cumulative returns. Future cumulative mean and
@@ -719,8 +1437,16 @@ def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
         A higher number of samples will generate a more accurate
         bootstrap cone.
     random_seed : int
-        Seed for the pseudorandom number generator used by the pandas
-        sample method.
+        Seed for the numpy random Generator used to draw the samples.
+    chunksize : int, optional
+        Number of samples drawn and summarized at a time, which bounds
+        memory use whatever num_samples is.
+    sampling : str, optional
+        How days are resampled: 'iid', 'block' or 'stationary'.
+         - See full explanation in timeseries.calc_bootstrap.
+    block_size : int or float, optional
+        (Mean) block length for block sampling.
+         - See full explanation in timeseries.calc_bootstrap.
 
     Returns
     -------
@@ -736,7 +1462,10 @@ def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
         num_days=num_days,
         starting_value=starting_value,
         num_samples=num_samples,
-        random_seed=random_seed
+        random_seed=random_seed,
+        chunksize=chunksize,
+        sampling=sampling,
+        block_size=block_size
     )
 
     cone_bounds = summarize_paths(